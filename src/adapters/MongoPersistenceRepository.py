@@ -1,25 +1,105 @@
-from typing import Optional
+import uuid
+from itertools import islice
+from threading import Event, Thread
+from time import time
+from typing import Optional, Iterator
 
 import pymongo
+from pymongo.errors import PyMongoError
 from multilingual_paragraph_extractor.domain.ParagraphsFromLanguage import ParagraphsFromLanguage
 from pydantic import BaseModel
+from trainable_entity_extractor.config import config_logger
 from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
 from trainable_entity_extractor.domain.LabeledData import LabeledData
 from trainable_entity_extractor.domain.PredictionData import PredictionData
 from trainable_entity_extractor.domain.Suggestion import Suggestion
 
-from config import MONGO_HOST, MONGO_PORT
+from config import (
+    MONGO_HOST,
+    MONGO_PORT,
+    MONGO_BULK_WRITE_BATCH_SIZE,
+    MONGO_READ_BATCH_SIZE,
+    MONGO_DRAIN_CLAIM_TIMEOUT_SECONDS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+)
+from domain.ModelRegistryEntry import ModelRegistryEntry
 from domain.ParagraphExtractionData import ParagraphExtractionData
 from ports.PersistenceRepository import PersistenceRepository
 
 
 class MongoPersistenceRepository(PersistenceRepository):
+    COLLECTIONS_NAMES = [
+        "labeled_data",
+        "prediction_data",
+        "suggestions",
+        "paragraph_extraction_data",
+        "paragraphs_from_languages",
+        "models_registry",
+    ]
+    EXTRACTION_INDEX_NAME = "run_name_extraction_name_id"
+    OUTDATED_INDEXES_NAMES = ["run_name_extraction_name"]
+    CREATE_INDEXES_RETRY_SECONDS = 10
 
-    def __init__(self):
-        self.mongodb_client = pymongo.MongoClient(f"{MONGO_HOST}:{MONGO_PORT}")
+    def __init__(
+        self, bulk_write_batch_size: int = MONGO_BULK_WRITE_BATCH_SIZE, read_batch_size: int = MONGO_READ_BATCH_SIZE
+    ):
+        self.bulk_write_batch_size = bulk_write_batch_size
+        self.read_batch_size = read_batch_size
+        self.drain_claim_timeout_seconds = MONGO_DRAIN_CLAIM_TIMEOUT_SECONDS
+        self.mongodb_client = pymongo.MongoClient(
+            f"{MONGO_HOST}:{MONGO_PORT}",
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS or None,
+        )
         self.mongo_db = self.mongodb_client["pdf_metadata_extraction"]
+        self.closed = Event()
+        self.indexes_created = Event()
+        self.indexes_thread = Thread(target=self.create_indexes_when_available, daemon=True)
+        self.indexes_thread.start()
+
+    def create_indexes(self):
+        extraction_index = [
+            ("run_name", pymongo.ASCENDING),
+            ("extraction_name", pymongo.ASCENDING),
+            ("_id", pymongo.ASCENDING),
+        ]
+        for collection_name in self.COLLECTIONS_NAMES:
+            collection = self.mongo_db[collection_name]
+            collection.create_index(extraction_index, name=self.EXTRACTION_INDEX_NAME)
+            for index_name in set(self.OUTDATED_INDEXES_NAMES).intersection(collection.index_information()):
+                collection.drop_index(index_name)
+
+    def create_indexes_when_available(self):
+        while not self.closed.is_set():
+            try:
+                self.create_indexes()
+                self.indexes_created.set()
+                return
+            except PyMongoError:
+                if self.closed.is_set():
+                    return
+                config_logger.error("Error creating the Mongo indexes. Retrying", exc_info=1)
+                self.closed.wait(self.CREATE_INDEXES_RETRY_SECONDS)
+
+    def get_indexes_usage(self) -> dict[str, dict[str, int]]:
+        indexes_usage: dict[str, dict[str, int]] = dict()
+        for collection_name in self.COLLECTIONS_NAMES:
+            indexes_stats = self.mongo_db[collection_name].aggregate([{"$indexStats": {}}])
+            indexes_usage[collection_name] = {x["name"]: x["accesses"]["ops"] for x in indexes_stats}
+
+        return indexes_usage
 
     def close(self):
+        self.closed.set()
         self.mongodb_client.close()
 
     @staticmethod
@@ -40,18 +120,94 @@ class MongoPersistenceRepository(PersistenceRepository):
         data_dict = self.inject_extractor_identifier(extraction_identifier, data_dict)
         self.mongo_db[collection_name].insert_one(data_dict)
 
+    def save_data_list(
+        self,
+        extraction_identifier: ExtractionIdentifier,
+        data_list: list[BaseModel],
+        collection_name: str,
+        staging_key: Optional[str] = None,
+    ):
+        documents = (self.inject_extractor_identifier(extraction_identifier, data.model_dump()) for data in data_list)
+        if staging_key:
+            documents = ({**document, "staging_key": staging_key} for document in documents)
+        while documents_batch := list(islice(documents, self.bulk_write_batch_size)):
+            self.mongo_db[collection_name].insert_many(documents_batch, ordered=False)
+
     def save_prediction_data(self, extraction_identifier: ExtractionIdentifier, prediction_data: PredictionData):
         self.save_data(extraction_identifier, prediction_data, "prediction_data")
 
+    def save_prediction_data_list(
+        self, extraction_identifier: ExtractionIdentifier, prediction_data_list: list[PredictionData]
+    ):
+        self.save_data_list(extraction_identifier, prediction_data_list, "prediction_data")
+
+    def claim_documents(
+        self,
+        extraction_identifier: ExtractionIdentifier,
+        collection_name: str,
+        claim: str,
+        last_id: Optional[object],
+        page_size: int,
+    ) -> tuple[Optional[object], list[dict]]:
+        collection = self.mongo_db[collection_name]
+        expired_claim = {"claimed_at": {"$lt": time() - self.drain_claim_timeout_seconds}}
+        unclaimed_filter = {
+            **self.get_filter(extraction_identifier),
+            "staging_key": {"$exists": False},
+            "$or": [{"claim": {"$exists": False}}, expired_claim],
+        }
+        page_filter = {**unclaimed_filter, "_id": {"$gt": last_id}} if last_id else unclaimed_filter
+        page = collection.find(page_filter, projection={"_id": True}, sort=[("_id", 1)], limit=page_size)
+        if self.indexes_created.is_set():
+            page = page.hint(self.EXTRACTION_INDEX_NAME)
+        ids = [x["_id"] for x in page]
+        if not ids:
+            return None, []
+
+        collection.update_many({**unclaimed_filter, "_id": {"$in": ids}}, {"$set": {"claim": claim, "claimed_at": time()}})
+        projection = {"run_name": False, "extraction_name": False, "claim": False, "claimed_at": False}
+        documents = collection.find({"_id": {"$in": ids}, "claim": claim}, projection=projection, sort=[("_id", 1)])
+        return ids[-1], list(documents)
+
+    def drain(
+        self, extraction_identifier: ExtractionIdentifier, collection_name: str, batch_size: int = None, limit: int = 0
+    ) -> Iterator[list[dict]]:
+        batch_size = batch_size if batch_size else self.read_batch_size
+        claim = uuid.uuid4().hex
+        last_id = None
+        drained_count = 0
+        try:
+            while not limit or drained_count < limit:
+                page_size = min(batch_size, limit - drained_count) if limit else batch_size
+                last_id, documents = self.claim_documents(extraction_identifier, collection_name, claim, last_id, page_size)
+                if last_id is None:
+                    break
+                if not documents:
+                    continue
+
+                ids = [document.pop("_id") for document in documents]
+                drained_count += len(documents)
+                yield documents
+                self.mongo_db[collection_name].delete_many({"_id": {"$in": ids}})
+        finally:
+            self.mongo_db[collection_name].update_many({"claim": claim}, {"$unset": {"claim": "", "claimed_at": ""}})
+
     def load_prediction_data(self, extraction_identifier: ExtractionIdentifier) -> list[PredictionData]:
-        data = self.mongo_db.prediction_data.find(self.get_filter(extraction_identifier))
-        prediction_data = [PredictionData(**document) for document in data]
-        self.mongo_db.prediction_data.delete_many(self.get_filter(extraction_identifier))
-        return prediction_data
+        documents_batches = self.drain(extraction_identifier, "prediction_data")
+        return [PredictionData(**document) for documents in documents_batches for document in documents]
+
+    def load_prediction_data_chunks(
+        self, extraction_identifier: ExtractionIdentifier, chunk_size: int
+    ) -> Iterator[list[PredictionData]]:
+        for documents in self.drain(extraction_identifier, "prediction_data", chunk_size):
+            yield [PredictionData(**document) for document in documents]
 
     def save_labeled_data(self, extraction_identifier: ExtractionIdentifier, labeled_data: LabeledData):
         self.save_data(extraction_identifier, labeled_data, "labeled_data")
 
+    def save_labeled_data_list(self, extraction_identifier: ExtractionIdentifier, labeled_data_list: list[LabeledData]):
+        self.save_data_list(extraction_identifier, labeled_data_list, "labeled_data")
+
     def delete_labeled_data(self, extraction_identifier: ExtractionIdentifier):
         self.mongo_db.labeled_data.delete_many(self.get_filter(extraction_identifier))
 
@@ -59,19 +215,27 @@ class MongoPersistenceRepository(PersistenceRepository):
         data = self.mongo_db.labeled_data.find(self.get_filter(extraction_identifier))
         return [LabeledData(**document) for document in data]
 
-    def save_suggestions(self, extraction_identifier: ExtractionIdentifier, suggestions: list[Suggestion]):
-        for suggestion in suggestions:
-            self.save_data(extraction_identifier, suggestion, "suggestions")
+    def save_suggestions(
+        self, extraction_identifier: ExtractionIdentifier, suggestions: list[Suggestion], staging_key: Optional[str] = None
+    ):
+        self.save_data_list(extraction_identifier, suggestions, "suggestions", staging_key)
 
-    def load_suggestions(self, extraction_identifier: ExtractionIdentifier) -> list[Suggestion]:
-        suggestions: list[Suggestion] = list()
+    def publish_staged_suggestions(self, extraction_identifier: ExtractionIdentifier, staging_key: str):
+        staged_filter = {**self.get_filter(extraction_identifier), "staging_key": staging_key}
+        self.mongo_db.suggestions.update_many(staged_filter, {"$unset": {"staging_key": ""}})
 
-        for document in self.mongo_db.suggestions.find(self.get_filter(extraction_identifier)):
-            suggestions.append(Suggestion(**document))
+    def delete_staged_suggestions(self, extraction_identifier: ExtractionIdentifier, staging_key: str):
+        self.mongo_db.suggestions.delete_many({**self.get_filter(extraction_identifier), "staging_key": staging_key})
 
-        self.mongo_db.suggestions.delete_many(self.get_filter(extraction_identifier))
+    def load_suggestions(self, extraction_identifier: ExtractionIdentifier) -> list[Suggestion]:
+        documents_batches = self.drain(extraction_identifier, "suggestions")
+        return [Suggestion(**document) for documents in documents_batches for document in documents]
 
-        return suggestions
+    def load_suggestions_chunks(
+        self, extraction_identifier: ExtractionIdentifier, chunk_size: int, limit: int = 0
+    ) -> Iterator[list[Suggestion]]:
+        for documents in self.drain(extraction_identifier, "suggestions", chunk_size, limit):
+            yield [Suggestion(**document) for document in documents]
 
     def save_paragraph_extraction_data(
         self, extraction_identifier: ExtractionIdentifier, paragraph_extraction_data: ParagraphExtractionData
@@ -91,11 +255,14 @@ class MongoPersistenceRepository(PersistenceRepository):
     ):
         self.save_data(extraction_identifier, paragraphs_from_languages, "paragraphs_from_languages")
 
+    def save_paragraphs_from_languages(
+        self, extraction_identifier: ExtractionIdentifier, paragraphs_from_languages: list[ParagraphsFromLanguage]
+    ):
+        self.save_data_list(extraction_identifier, paragraphs_from_languages, "paragraphs_from_languages")
+
     def load_paragraphs_from_languages(self, extraction_identifier: ExtractionIdentifier) -> list[ParagraphsFromLanguage]:
-        data = self.mongo_db.paragraphs_from_languages.find(self.get_filter(extraction_identifier))
-        paragraphs = [ParagraphsFromLanguage(**document) for document in data]
-        self.mongo_db.paragraphs_from_languages.delete_many(self.get_filter(extraction_identifier))
-        return paragraphs
+        documents_batches = self.drain(extraction_identifier, "paragraphs_from_languages")
+        return [ParagraphsFromLanguage(**document) for documents in documents_batches for document in documents]
 
     def delete_paragraphs_from_languages(self, extraction_identifier: ExtractionIdentifier):
         self.mongo_db.paragraphs_from_languages.delete_many(self.get_filter(extraction_identifier))
@@ -103,3 +270,21 @@ class MongoPersistenceRepository(PersistenceRepository):
     def delete_prediction_data(self, extraction_identifier: ExtractionIdentifier, filters: list[dict[str, str]]):
         for one_filter in filters:
             self.mongo_db.suggestions.delete_many({**self.get_filter(extraction_identifier), **one_filter})
+
+    def save_model_registry_entry(self, model_registry_entry: ModelRegistryEntry):
+        entry_filter = {"run_name": model_registry_entry.run_name, "extraction_name": model_registry_entry.extraction_name}
+        self.mongo_db.models_registry.update_one(entry_filter, {"$set": model_registry_entry.model_dump()}, upsert=True)
+
+    def update_model_registry_last_used(
+        self, extraction_identifier: ExtractionIdentifier, last_used: float, task_started_at: Optional[float] = None
+    ):
+        update = {"last_used": last_used}
+        if task_started_at is not None:
+            update["task_started_at"] = task_started_at
+        self.mongo_db.models_registry.update_one(self.get_filter(extraction_identifier), {"$set": update}, upsert=True)
+
+    def load_model_registry(self) -> list[ModelRegistryEntry]:
+        return [ModelRegistryEntry(**document) for document in self.mongo_db.models_registry.find({}, {"_id": False})]
+
+    def delete_model_registry_entry(self, extraction_identifier: ExtractionIdentifier):
+        self.mongo_db.models_registry.delete_many(self.get_filter(extraction_identifier))
@@ -0,0 +1,10 @@
+from multilingual_paragraph_extractor.domain.ParagraphsFromLanguage import ParagraphsFromLanguage
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+
+
+class StubMultilingualParagraphAligner:
+    def __init__(self, extraction_identifier: ExtractionIdentifier):
+        self.extraction_identifier = extraction_identifier
+
+    def align_languages(self, paragraphs_from_languages: list[ParagraphsFromLanguage]):
+        pass
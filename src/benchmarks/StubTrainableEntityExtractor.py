@@ -0,0 +1,30 @@
+from trainable_entity_extractor.domain.ExtractionData import ExtractionData
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.PredictionSample import PredictionSample
+from trainable_entity_extractor.domain.Suggestion import Suggestion
+
+
+class StubTrainableEntityExtractor:
+    def __init__(self, extraction_identifier: ExtractionIdentifier):
+        self.extraction_identifier = extraction_identifier
+
+    def train(self, extraction_data: ExtractionData) -> (bool, str):
+        return True, ""
+
+    def predict(self, prediction_samples: list[PredictionSample]) -> list[Suggestion]:
+        suggestions: list[Suggestion] = list()
+        for prediction_sample in prediction_samples:
+            segments = prediction_sample.pdf_data.pdf_data_segments
+            text = segments[0].text_content if segments else ""
+            suggestion = Suggestion(
+                tenant=self.extraction_identifier.run_name,
+                id=self.extraction_identifier.extraction_name,
+                xml_file_name=prediction_sample.entity_name,
+                text=text,
+                segment_text=text,
+                page_number=1,
+                segments_boxes=[],
+            )
+            suggestions.append(suggestion)
+
+        return suggestions
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import json
+import math
+import shutil
+import uuid
+from contextlib import AsyncExitStack
+from datetime import datetime
+from os.path import join
+from random import Random
+from time import perf_counter
+
+import httpx
+import mongomock
+from trainable_entity_extractor.config import config_logger
+
+from benchmarks.synthetic_data import get_lines, get_xml_content, PAGE_WIDTH, PAGE_HEIGHT
+from config import DATA_PATH, MONGO_HOST, MONGO_PORT
+from drivers.rest.app import app, lifespan
+
+EXTRACTION_ID = "extraction_id"
+ROUTES = ["xml_to_train", "xml_to_predict", "labeled_data", "prediction_data", "get_suggestions"]
+DEFAULT_MIX = "xml_to_train=1,xml_to_predict=1,labeled_data=2,prediction_data=2,get_suggestions=1"
+
+
+def get_mix(mix: str) -> dict[str, int]:
+    weights: dict[str, int] = dict()
+    for route_weight in mix.split(","):
+        route, weight = route_weight.split("=")
+        if route.strip() not in ROUTES:
+            raise ValueError(f"Unknown route {route}. Routes: {', '.join(ROUTES)}")
+        weights[route.strip()] = int(weight)
+
+    return weights
+
+
+def get_percentile(latencies: list[float], percentile: int) -> float:
+    sorted_latencies = sorted(latencies)
+    return sorted_latencies[max(0, math.ceil(len(sorted_latencies) * percentile / 100) - 1)]
+
+
+async def send_request(client: httpx.AsyncClient, route: str, index: int, tenant: str, xml_content: bytes) -> httpx.Response:
+    if route == "xml_to_train":
+        files = {"file": (f"load_test_{index}.xml", xml_content)}
+        return await client.post(f"/xml_to_train/{tenant}/{EXTRACTION_ID}", files=files)
+
+    if route == "xml_to_predict":
+        files = {"file": (f"load_test_{index}.xml", xml_content)}
+        return await client.post(f"/xml_to_predict/{tenant}/{EXTRACTION_ID}", files=files)
+
+    if route == "labeled_data":
+        labeled_data_json = {
+            "id": EXTRACTION_ID,
+            "tenant": tenant,
+            "xml_file_name": f"load_test_{index}.xml",
+            "language_iso": "en",
+            "label_text": "text",
+            "page_width": PAGE_WIDTH,
+            "page_height": PAGE_HEIGHT,
+            "xml_segments_boxes": [],
+            "label_segments_boxes": [],
+        }
+        return await client.post("/labeled_data", json=labeled_data_json)
+
+    if route == "prediction_data":
+        prediction_data_json = {
+            "id": EXTRACTION_ID,
+            "tenant": tenant,
+            "xml_file_name": f"load_test_{index}.xml",
+            "page_width": PAGE_WIDTH,
+            "page_height": PAGE_HEIGHT,
+            "xml_segments_boxes": [],
+        }
+        return await client.post("/prediction_data", json=prediction_data_json)
+
+    return await client.get(f"/get_suggestions/{tenant}/{EXTRACTION_ID}")
+
+
+def get_routes_results(
+    requests_results: list[tuple[str, float, bool]], seconds: float, routes: list[str]
+) -> dict[str, dict[str, float]]:
+    routes_results: dict[str, dict[str, float]] = dict()
+    for route in routes:
+        latencies = [latency for request_route, latency, _ in requests_results if request_route == route]
+        if not latencies:
+            continue
+
+        errors = len([x for x in requests_results if x[0] == route and not x[2]])
+        routes_results[route] = {
+            "requests": len(latencies),
+            "requests_per_second": round(len(latencies) / seconds, 2),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4),
+            "p50_ms": round(get_percentile(latencies, 50) * 1000, 2),
+            "p90_ms": round(get_percentile(latencies, 90) * 1000, 2),
+            "p99_ms": round(get_percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+        }
+
+    return routes_results
+
+
+async def run_level(
+    client: httpx.AsyncClient, concurrency: int, routes_sequence: list[str], tenant: str, xml_content: bytes
+) -> dict:
+    requests_results: list[tuple[str, float, bool]] = list()
+    next_index = iter(range(len(routes_sequence)))
+
+    async def run_client():
+        for index in next_index:
+            route = routes_sequence[index]
+            start = perf_counter()
+            try:
+                response = await send_request(client, route, index, tenant, xml_content)
+                success = response.status_code < 400
+            except httpx.HTTPError:
+                success = False
+            requests_results.append((route, perf_counter() - start, success))
+
+    start = perf_counter()
+    await asyncio.gather(*[run_client() for _ in range(concurrency)])
+    seconds = perf_counter() - start
+
+    routes = sorted({route for route, _, _ in requests_results}, key=ROUTES.index)
+    errors = len([x for x in requests_results if not x[2]])
+    return {
+        "concurrency": concurrency,
+        "requests": len(requests_results),
+        "seconds": round(seconds, 4),
+        "requests_per_second": round(len(requests_results) / seconds, 2) if seconds else 0,
+        "errors": errors,
+        "error_rate": round(errors / len(requests_results), 4) if requests_results else 0,
+        "routes": get_routes_results(requests_results, seconds, routes),
+    }
+
+
+async def run_load_test(arguments: argparse.Namespace) -> dict:
+    tenant = f"load_test_{uuid.uuid4().hex[:8]}"
+    mix = get_mix(arguments.mix)
+    random = Random(arguments.seed)
+    xml_content = get_xml_content(get_lines(arguments.pages, arguments.tokens_per_page, arguments.seed), arguments.pages)
+
+    levels: list[dict] = list()
+    async with AsyncExitStack() as stack:
+        if arguments.url:
+            client = await stack.enter_async_context(httpx.AsyncClient(base_url=arguments.url, timeout=arguments.timeout))
+        else:
+            if not arguments.local_mongo:
+                stack.enter_context(mongomock.patch(servers=[f"{MONGO_HOST}:{MONGO_PORT}"]))
+            await stack.enter_async_context(lifespan(app))
+            transport = httpx.ASGITransport(app=app)
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=arguments.timeout)
+            )
+
+        try:
+            for concurrency in arguments.concurrency:
+                routes_sequence = random.choices(list(mix), weights=list(mix.values()), k=arguments.requests)
+                level = await run_level(client, concurrency, routes_sequence, tenant, xml_content.encode())
+                config_logger.info(
+                    f"Concurrency {concurrency}: {level['requests_per_second']} requests per second, "
+                    f"error rate {level['error_rate']}"
+                )
+                levels.append(level)
+        finally:
+            if arguments.url:
+                await client.delete(f"/{tenant}/{EXTRACTION_ID}")
+            else:
+                shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
+    return {
+        "date": datetime.now().isoformat(),
+        "target": arguments.url if arguments.url else "in-process",
+        "parameters": vars(arguments),
+        "levels": levels,
+    }
+
+
+def get_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test of the REST API ingest and suggestions routes")
+    parser.add_argument("--url", help="Base URL of a running API. When it is not set, the app runs in-process")
+    parser.add_argument("--local-mongo", action="store_true", help="Use the configured Mongo instead of mongomock")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Route weights. Default: {DEFAULT_MIX}")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="Requests for each concurrency level")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--tokens-per-page", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="Path of the JSON results. They are printed when it is not set")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    load_test_arguments = get_arguments()
+    load_test_results = asyncio.run(run_load_test(load_test_arguments))
+    load_test_json = json.dumps(load_test_results, indent=4)
+    if load_test_arguments.output:
+        with open(load_test_arguments.output, "w") as output_file:
+            output_file.write(load_test_json)
+        config_logger.info(f"Load test results saved in {load_test_arguments.output}")
+    else:
+        print(load_test_json)
@@ -0,0 +1,242 @@
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import uuid
+from contextlib import ExitStack
+from datetime import datetime
+from functools import partial
+from os.path import join
+from time import perf_counter
+from typing import Callable
+from unittest.mock import patch
+
+import mongomock
+from trainable_entity_extractor.config import config_logger
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.LabeledData import LabeledData
+from trainable_entity_extractor.domain.PredictionData import PredictionData
+from trainable_entity_extractor.use_cases.XmlFile import XmlFile
+
+from adapters.MongoPersistenceRepository import MongoPersistenceRepository
+from benchmarks.StubMultilingualParagraphAligner import StubMultilingualParagraphAligner
+from benchmarks.StubTrainableEntityExtractor import StubTrainableEntityExtractor
+from benchmarks.synthetic_data import write_xml, get_line_box, PAGE_WIDTH, PAGE_HEIGHT
+from config import DATA_PATH, MONGO_HOST, MONGO_PORT, PARAGRAPH_EXTRACTION_NAME, ROOT_PATH
+from domain.ParagraphExtractionData import ParagraphExtractionData, XmlData
+from domain.ParagraphExtractorTask import ParagraphExtractorTask
+from domain.Params import Params
+from domain.TrainableEntityExtractionTask import TrainableEntityExtractionTask
+from domain.XML import XML
+from ports.PersistenceRepository import PersistenceRepository
+from use_cases.Extractor import Extractor
+from use_cases.MemoryUsageTracker import MemoryUsageTracker
+from use_cases.PdfDataCache import PdfDataCache
+from use_cases.PdfDataParser import PdfDataParser
+from use_cases.metrics import STAGE_SECONDS
+
+TASKS_NAMES = [Extractor.CREATE_MODEL_TASK_NAME, Extractor.SUGGESTIONS_TASK_NAME, PARAGRAPH_EXTRACTION_NAME]
+LANGUAGES = ["en", "fr", "es", "ru", "ar", "zh"]
+
+
+def get_stages_totals(task_name: str) -> dict[str, dict[str, float]]:
+    stages_totals: dict[str, dict[str, float]] = dict()
+    for metric in STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.labels.get("task") != task_name or not sample.name.endswith(("_count", "_sum")):
+                continue
+            stage_totals = stages_totals.setdefault(sample.labels["stage"], {"count": 0, "seconds": 0})
+            stage_totals["count" if sample.name.endswith("_count") else "seconds"] = sample.value
+
+    return stages_totals
+
+
+def measure(task_name: str, documents: int, run: Callable[[], tuple[bool, str]], trace_python_allocations: bool):
+    stages_before = get_stages_totals(task_name)
+    start = perf_counter()
+    with MemoryUsageTracker(trace_python_allocations) as memory_usage_tracker:
+        success, error_message = run()
+    seconds = perf_counter() - start
+
+    stages: dict[str, dict[str, float]] = dict()
+    for stage, totals in get_stages_totals(task_name).items():
+        stage_before = stages_before.get(stage, {"count": 0, "seconds": 0})
+        count = int(totals["count"] - stage_before["count"])
+        if count:
+            stages[stage] = {"count": count, "seconds": round(totals["seconds"] - stage_before["seconds"], 4)}
+
+    return {
+        "success": success,
+        "error_message": error_message,
+        "documents": documents,
+        "seconds": round(seconds, 4),
+        "documents_per_second": round(documents / seconds, 2) if seconds else 0,
+        "stages": stages,
+        "memory_usage": memory_usage_tracker.memory_usage.model_dump(),
+    }
+
+
+def get_labeled_data(extraction_identifier: ExtractionIdentifier, xml_file_name: str, lines: list) -> LabeledData:
+    page_number, top, text = lines[0]
+    return LabeledData(
+        tenant=extraction_identifier.run_name,
+        id=extraction_identifier.extraction_name,
+        xml_file_name=xml_file_name,
+        language_iso="en",
+        label_text=text,
+        page_width=PAGE_WIDTH,
+        page_height=PAGE_HEIGHT,
+        xml_segments_boxes=[],
+        label_segments_boxes=[get_line_box(page_number, top, text)],
+    )
+
+
+def benchmark_create_model(persistence_repository: PersistenceRepository, arguments: argparse.Namespace, tenant: str):
+    extraction_identifier = ExtractionIdentifier(run_name=tenant, extraction_name="extraction_id", output_path=DATA_PATH)
+    labeled_data_list: list[LabeledData] = list()
+    for index in range(arguments.documents):
+        xml_file = XmlFile(extraction_identifier=extraction_identifier, to_train=True, xml_file_name=f"train_{index}.xml")
+        lines = write_xml(xml_file.xml_file_path, arguments.pages, arguments.tokens_per_page, arguments.seed + index)
+        labeled_data_list.append(get_labeled_data(extraction_identifier, xml_file.xml_file_name, lines))
+
+    persistence_repository.save_labeled_data_list(extraction_identifier, labeled_data_list)
+    task = TrainableEntityExtractionTask(
+        tenant=tenant, task=Extractor.CREATE_MODEL_TASK_NAME, params=Params(id=extraction_identifier.extraction_name)
+    )
+    run = partial(Extractor.calculate_task, task, persistence_repository)
+    return measure(task.task, arguments.documents, run, arguments.trace_python_allocations)
+
+
+def benchmark_suggestions(persistence_repository: PersistenceRepository, arguments: argparse.Namespace, tenant: str):
+    extraction_identifier = ExtractionIdentifier(run_name=tenant, extraction_name="extraction_id", output_path=DATA_PATH)
+    prediction_data_list: list[PredictionData] = list()
+    for index in range(arguments.documents):
+        xml_file = XmlFile(extraction_identifier=extraction_identifier, to_train=False, xml_file_name=f"predict_{index}.xml")
+        write_xml(xml_file.xml_file_path, arguments.pages, arguments.tokens_per_page, arguments.seed + index)
+        prediction_data = PredictionData(
+            tenant=tenant,
+            id=extraction_identifier.extraction_name,
+            xml_file_name=xml_file.xml_file_name,
+            page_width=PAGE_WIDTH,
+            page_height=PAGE_HEIGHT,
+            xml_segments_boxes=[],
+        )
+        prediction_data_list.append(prediction_data)
+
+    persistence_repository.save_prediction_data_list(extraction_identifier, prediction_data_list)
+    task = TrainableEntityExtractionTask(
+        tenant=tenant, task=Extractor.SUGGESTIONS_TASK_NAME, params=Params(id=extraction_identifier.extraction_name)
+    )
+    run = partial(Extractor.calculate_task, task, persistence_repository)
+    return measure(task.task, arguments.documents, run, arguments.trace_python_allocations)
+
+
+def benchmark_paragraph_extraction(persistence_repository: PersistenceRepository, arguments: argparse.Namespace, key: str):
+    extraction_identifier = ExtractionIdentifier(
+        run_name=PARAGRAPH_EXTRACTION_NAME, extraction_name=key, output_path=DATA_PATH
+    )
+    xmls_data: list[XmlData] = list()
+    for index in range(arguments.documents):
+        xml_file = XmlFile(
+            extraction_identifier=extraction_identifier, to_train=True, xml_file_name=f"paragraphs_{index}.xml"
+        )
+        lines = write_xml(xml_file.xml_file_path, arguments.pages, arguments.tokens_per_page, arguments.seed + index)
+        xml_data = XmlData(
+            xml_file_name=xml_file.xml_file_name,
+            language=LANGUAGES[index % len(LANGUAGES)],
+            is_main_language=index == 0,
+            xml_segments_boxes=[get_line_box(page_number, top, text) for page_number, top, text in lines],
+        )
+        xmls_data.append(xml_data)
+
+    paragraph_extraction_data = ParagraphExtractionData(key=key, xmls=xmls_data)
+    persistence_repository.save_paragraph_extraction_data(extraction_identifier, paragraph_extraction_data)
+    task = ParagraphExtractorTask(
+        task=PARAGRAPH_EXTRACTION_NAME,
+        key=key,
+        xmls=[XML(**x.model_dump()) for x in xmls_data],
+    )
+    run = partial(Extractor.calculate_task, task, persistence_repository)
+    return measure(task.task, arguments.documents, run, arguments.trace_python_allocations)
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_PATH, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def get_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Extractor pipeline with synthetic XMLs")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--tokens-per-page", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=["stub", "real"], default="stub")
+    parser.add_argument("--tasks", nargs="+", choices=TASKS_NAMES, default=TASKS_NAMES)
+    parser.add_argument("--pdf-data-cache", action="store_true", help="Use a PdfData cache during the run")
+    parser.add_argument("--trace-python-allocations", action="store_true")
+    parser.add_argument("--output", help="Path of the JSON results. They are printed when it is not set")
+    return parser.parse_args()
+
+
+def run_benchmarks(arguments: argparse.Namespace) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    tenant = f"benchmark_{run_id}"
+    paragraphs_key = f"benchmark_{run_id}"
+    pdf_data_cache_path = join(DATA_PATH, "cache", f"pdf_data_{tenant}")
+    pdf_data_cache = PdfDataCache(pdf_data_cache_path, max_size_mb=1024 if arguments.pdf_data_cache else 0)
+
+    results: dict[str, dict] = dict()
+    with ExitStack() as stack:
+        stack.enter_context(mongomock.patch(servers=[f"{MONGO_HOST}:{MONGO_PORT}"]))
+        stack.enter_context(patch("use_cases.Extractor.send_logs", lambda *args, **kwargs: None))
+        stack.enter_context(
+            patch("use_cases.Extractor.PdfDataParser", partial(PdfDataParser, pdf_data_cache=pdf_data_cache))
+        )
+        if arguments.backend == "stub":
+            stack.enter_context(patch("use_cases.Extractor.TrainableEntityExtractor", StubTrainableEntityExtractor))
+            stack.enter_context(
+                patch("use_cases.Extractor.MultilingualParagraphAlignerUseCase", StubMultilingualParagraphAligner)
+            )
+
+        persistence_repository = MongoPersistenceRepository()
+        try:
+            if Extractor.CREATE_MODEL_TASK_NAME in arguments.tasks:
+                results[Extractor.CREATE_MODEL_TASK_NAME] = benchmark_create_model(persistence_repository, arguments, tenant)
+            if Extractor.SUGGESTIONS_TASK_NAME in arguments.tasks:
+                results[Extractor.SUGGESTIONS_TASK_NAME] = benchmark_suggestions(persistence_repository, arguments, tenant)
+            if PARAGRAPH_EXTRACTION_NAME in arguments.tasks:
+                results[PARAGRAPH_EXTRACTION_NAME] = benchmark_paragraph_extraction(
+                    persistence_repository, arguments, paragraphs_key
+                )
+        finally:
+            persistence_repository.close()
+            Extractor.trainable_entity_extractors_cache.invalidate(
+                ExtractionIdentifier(run_name=tenant, extraction_name="extraction_id", output_path=DATA_PATH)
+            )
+            shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+            shutil.rmtree(join(DATA_PATH, PARAGRAPH_EXTRACTION_NAME, paragraphs_key), ignore_errors=True)
+            shutil.rmtree(pdf_data_cache_path, ignore_errors=True)
+
+    return {
+        "date": datetime.now().isoformat(),
+        "git_commit": get_git_commit(),
+        "python_version": platform.python_version(),
+        "parameters": vars(arguments),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    benchmark_arguments = get_arguments()
+    benchmark_results = run_benchmarks(benchmark_arguments)
+    benchmark_json = json.dumps(benchmark_results, indent=4)
+    if benchmark_arguments.output:
+        with open(benchmark_arguments.output, "w") as output_file:
+            output_file.write(benchmark_json)
+        config_logger.info(f"Benchmark results saved in {benchmark_arguments.output}")
+    else:
+        print(benchmark_json)
@@ -0,0 +1,97 @@
+import os
+from os.path import dirname
+from random import Random
+
+from trainable_entity_extractor.domain.SegmentBox import SegmentBox
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+LINE_HEIGHT = 12
+LEFT_MARGIN = 72
+TOKENS_PER_LINE = 10
+CHARACTER_WIDTH = 5
+WORDS = [
+    "report",
+    "general",
+    "assembly",
+    "council",
+    "resolution",
+    "session",
+    "committee",
+    "human",
+    "rights",
+    "article",
+    "decision",
+    "state",
+    "party",
+    "paragraph",
+    "meeting",
+    "annex",
+    "agenda",
+    "item",
+    "convention",
+    "recommendation",
+]
+
+
+def get_lines(pages: int, tokens_per_page: int, seed: int) -> list[tuple[int, int, str]]:
+    random = Random(seed)
+    lines: list[tuple[int, int, str]] = list()
+    for page_number in range(1, pages + 1):
+        tokens_left = tokens_per_page
+        top = 2 * LINE_HEIGHT
+        while tokens_left > 0 and top < PAGE_HEIGHT - 2 * LINE_HEIGHT:
+            tokens_count = min(TOKENS_PER_LINE, tokens_left)
+            lines.append((page_number, top, " ".join(random.choice(WORDS) for _ in range(tokens_count))))
+            tokens_left -= tokens_count
+            top += LINE_HEIGHT + 2
+
+    return lines
+
+
+def get_text_width(text: str) -> int:
+    return min(len(text) * CHARACTER_WIDTH, PAGE_WIDTH - 2 * LEFT_MARGIN)
+
+
+def get_line_box(page_number: int, top: int, text: str) -> SegmentBox:
+    return SegmentBox(
+        left=LEFT_MARGIN,
+        top=top,
+        width=get_text_width(text),
+        height=LINE_HEIGHT,
+        page_width=PAGE_WIDTH,
+        page_height=PAGE_HEIGHT,
+        page_number=page_number,
+    )
+
+
+def get_xml_content(lines: list[tuple[int, int, str]], pages: int) -> str:
+    xml_lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<!DOCTYPE pdf2xml SYSTEM "pdf2xml.dtd">',
+        "",
+        '<pdf2xml producer="poppler" version="23.07.0">',
+    ]
+    for page_number in range(1, pages + 1):
+        xml_lines.append(
+            f'<page number="{page_number}" position="absolute" top="0" left="0" height="{PAGE_HEIGHT}" width="{PAGE_WIDTH}">'
+        )
+        xml_lines.append('\t<fontspec id="0" size="10" family="TimesNewRomanPSMT" color="#000000"/>')
+        for line_page_number, top, text in lines:
+            if line_page_number == page_number:
+                width = get_text_width(text)
+                xml_lines.append(
+                    f'<text top="{top}" left="{LEFT_MARGIN}" width="{width}" height="{LINE_HEIGHT}" font="0">{text}</text>'
+                )
+        xml_lines.append("</page>")
+
+    xml_lines.append("</pdf2xml>")
+    return "\n".join(xml_lines)
+
+
+def write_xml(xml_file_path: str, pages: int, tokens_per_page: int, seed: int) -> list[tuple[int, int, str]]:
+    lines = get_lines(pages, tokens_per_page, seed)
+    os.makedirs(dirname(xml_file_path), exist_ok=True)
+    with open(xml_file_path, "w") as file:
+        file.write(get_xml_content(lines, pages))
+    return lines
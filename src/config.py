@@ -19,3 +19,44 @@ ENVIRONMENT = os.environ.get("ENVIRONMENT", "development")
 APP_PATH = Path(__file__).parent.absolute()
 ROOT_PATH = Path(__file__).parent.parent.absolute()
 DATA_PATH = join(ROOT_PATH, "models_data")
+
+PREDICTION_CHUNK_SIZE = int(os.environ.get("PREDICTION_CHUNK_SIZE", "500"))
+PDF_DATA_CACHE_PATH = join(DATA_PATH, "cache", "pdf_data")
+PDF_DATA_CACHE_MAX_SIZE_MB = int(os.environ.get("PDF_DATA_CACHE_MAX_SIZE_MB", "2048"))
+PREDICTIONS_MEMO_MAX_SIZE_MB = int(os.environ.get("PREDICTIONS_MEMO_MAX_SIZE_MB", "256"))
+MODELS_CACHE_MEMORY_BUDGET_MB = int(os.environ.get("MODELS_CACHE_MEMORY_BUDGET_MB", "2048"))
+MODELS_CACHE_PATCH_LOADERS = os.environ.get("MODELS_CACHE_PATCH_LOADERS", "false").lower() in ["true", "1"]
+MONGO_BULK_WRITE_BATCH_SIZE = int(os.environ.get("MONGO_BULK_WRITE_BATCH_SIZE", "1000"))
+MONGO_READ_BATCH_SIZE = int(os.environ.get("MONGO_READ_BATCH_SIZE", "1000"))
+MONGO_DRAIN_CLAIM_TIMEOUT_SECONDS = int(os.environ.get("MONGO_DRAIN_CLAIM_TIMEOUT_SECONDS", "600"))
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "0"))
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+ARCHIVE_WRITE_WORKERS = int(os.environ.get("ARCHIVE_WRITE_WORKERS", "8"))
+ARCHIVE_MAX_FILES = int(os.environ.get("ARCHIVE_MAX_FILES", "10000"))
+ARCHIVE_MAX_UNCOMPRESSED_SIZE_MB = int(os.environ.get("ARCHIVE_MAX_UNCOMPRESSED_SIZE_MB", "4096"))
+MODELS_MAX_AGE_DAYS = int(os.environ.get("MODELS_MAX_AGE_DAYS", "730"))
+MODELS_DISK_QUOTA_GB = float(os.environ.get("MODELS_DISK_QUOTA_GB", "0"))
+MODELS_JANITOR_INTERVAL_SECONDS = int(os.environ.get("MODELS_JANITOR_INTERVAL_SECONDS", "3600"))
+TASKS_WORKERS = int(os.environ.get("TASKS_WORKERS", "1"))
+XML_PARSING_WORKERS = int(os.environ.get("XML_PARSING_WORKERS", max(1, os.cpu_count() // max(1, TASKS_WORKERS))))
+CREATE_MODEL_TASKS_LIMIT = int(os.environ.get("CREATE_MODEL_TASKS_LIMIT", "1"))
+SUGGESTIONS_TASKS_LIMIT = int(os.environ.get("SUGGESTIONS_TASKS_LIMIT", TASKS_WORKERS))
+PARAGRAPH_EXTRACTION_TASKS_LIMIT = int(os.environ.get("PARAGRAPH_EXTRACTION_TASKS_LIMIT", TASKS_WORKERS))
+TASKS_VISIBILITY_TIMEOUT_SECONDS = int(os.environ.get("TASKS_VISIBILITY_TIMEOUT_SECONDS", "86400"))
+TASKS_PENDING_VISIBILITY_TIMEOUT_SECONDS = int(os.environ.get("TASKS_PENDING_VISIBILITY_TIMEOUT_SECONDS", "60"))
+TASKS_PREFETCH = int(os.environ.get("TASKS_PREFETCH", TASKS_WORKERS))
+CREATE_MODEL_TASKS_PRIORITY = int(os.environ.get("CREATE_MODEL_TASKS_PRIORITY", "1"))
+SUGGESTIONS_TASKS_PRIORITY = int(os.environ.get("SUGGESTIONS_TASKS_PRIORITY", "0"))
+PARAGRAPH_EXTRACTION_TASKS_PRIORITY = int(os.environ.get("PARAGRAPH_EXTRACTION_TASKS_PRIORITY", "0"))
+TASKS_MAX_WAIT_SECONDS = float(os.environ.get("TASKS_MAX_WAIT_SECONDS", "900"))
+PROFILE_TASKS = os.environ.get("PROFILE_TASKS", "false").lower() in ["true", "1"]
+PROFILING_INTERVAL_SECONDS = float(os.environ.get("PROFILING_INTERVAL_SECONDS", "0.01"))
+TRACE_PYTHON_ALLOCATIONS = os.environ.get("TRACE_PYTHON_ALLOCATIONS", "false").lower() in ["true", "1"]
+MEMORY_USAGE_IN_RESULTS = os.environ.get("MEMORY_USAGE_IN_RESULTS", "false").lower() in ["true", "1"]
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+TASKS_WAIT_TIMES_LOG_SECONDS = int(os.environ.get("TASKS_WAIT_TIMES_LOG_SECONDS", "300"))
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class MemoryUsage(BaseModel):
+    peak_rss_mb: float
+    python_peak_mb: Optional[float] = None
+    process_wide: bool = False
+
+    def to_string(self):
+        python_peak = f", python peak: {self.python_peak_mb} MB" if self.python_peak_mb is not None else ""
+        scope = "process-wide " if self.process_wide else ""
+        return f"{scope}peak RSS: {self.peak_rss_mb} MB{python_peak}"
@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ModelRegistryEntry(BaseModel):
+    run_name: str
+    extraction_name: str
+    last_used: float
+    size: int = 0
+    task_started_at: Optional[float] = None
@@ -1,5 +1,8 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
+from domain.MemoryUsage import MemoryUsage
 from domain.XML import XML
 
 
@@ -9,3 +12,4 @@ class ParagraphExtractionResultsMessage(BaseModel):
     success: bool
     error_message: str
     data_url: str = None
+    memory_usage: Optional[MemoryUsage] = None
@@ -6,4 +6,5 @@ class Params(BaseModel):
     id: str
     options: list[Option] = list()
     multi_value: bool = False
+    incremental: bool = False
     metadata: dict[str, str] = dict()
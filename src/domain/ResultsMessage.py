@@ -2,6 +2,7 @@ from typing import Optional
 
 from pydantic import BaseModel
 
+from domain.MemoryUsage import MemoryUsage
 from domain.Params import Params
 
 
@@ -12,6 +13,7 @@ class ResultsMessage(BaseModel):
     success: bool
     error_message: str
     data_url: Optional[str] = None
+    memory_usage: Optional[MemoryUsage] = None
 
     def to_string(self):
         return f"tenant: {self.tenant}, id: {self.params.id}, task: {self.task}, success: {self.success}, error_message: {self.error_message}"
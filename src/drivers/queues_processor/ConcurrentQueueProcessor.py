@@ -0,0 +1,320 @@
+import json
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from threading import Lock
+from time import sleep, time
+from typing import Callable, Optional
+
+from rsmq import RedisSMQ
+
+from config import (
+    TASKS_VISIBILITY_TIMEOUT_SECONDS,
+    TASKS_PENDING_VISIBILITY_TIMEOUT_SECONDS,
+    TASKS_MAX_WAIT_SECONDS,
+    TASKS_WAIT_TIMES_LOG_SECONDS,
+)
+from drivers.queues_processor.QueueTask import QueueTask
+from use_cases.metrics import QUEUE_WAIT_SECONDS, STARVING_TASKS_PROMOTED
+
+
+class ConcurrentQueueProcessor:
+    POLLING_SECONDS = 1
+    WAIT_TIMES_SAMPLES = 1000
+
+    def __init__(
+        self,
+        redis_host: str,
+        redis_port: str,
+        queues_names: list[str],
+        workers: int,
+        task_types_limits: dict[str, int],
+        logger: Logger,
+        task_types_priorities: Optional[dict[str, int]] = None,
+        max_wait_seconds: float = TASKS_MAX_WAIT_SECONDS,
+        prefetch: int = 0,
+        visibility_timeout: int = TASKS_VISIBILITY_TIMEOUT_SECONDS,
+        pending_visibility_timeout: int = TASKS_PENDING_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        self.tasks_queues = {x: RedisSMQ(host=redis_host, port=redis_port, qname=f"{x}_tasks") for x in queues_names}
+        self.results_queues = {x: RedisSMQ(host=redis_host, port=redis_port, qname=f"{x}_results") for x in queues_names}
+        self.workers = workers
+        self.task_types_limits = task_types_limits
+        self.task_types_priorities = task_types_priorities or dict()
+        self.max_wait_seconds = max_wait_seconds
+        self.prefetch = prefetch
+        self.visibility_timeout = visibility_timeout
+        self.pending_visibility_timeout = pending_visibility_timeout
+        self.logger = logger
+        self.lock = Lock()
+        self.pending_tasks: list[QueueTask] = list()
+        self.running_task_types: Counter[str] = Counter()
+        self.running_extraction_keys: set[str] = set()
+        self.wait_times: dict[str, deque[float]] = dict()
+        self.stopping = False
+
+    def create_queues(self):
+        for queue in [*self.tasks_queues.values(), *self.results_queues.values()]:
+            queue.createQueue().exceptions(False).execute()
+
+    def get_task_type_limit(self, task_type: str) -> int:
+        return self.task_types_limits.get(task_type, self.workers)
+
+    def get_free_workers(self) -> int:
+        return self.workers - sum(self.running_task_types.values())
+
+    def get_unblocked_tasks(self) -> list[QueueTask]:
+        unblocked_tasks: list[QueueTask] = list()
+        blocked_extraction_keys = set(self.running_extraction_keys)
+        for task in self.pending_tasks:
+            if task.extraction_key in blocked_extraction_keys:
+                continue
+
+            if task.extraction_key:
+                blocked_extraction_keys.add(task.extraction_key)
+            unblocked_tasks.append(task)
+
+        return unblocked_tasks
+
+    def can_receive(self) -> bool:
+        if self.stopping:
+            return False
+
+        runnable_tasks = [
+            x
+            for x in self.get_unblocked_tasks()
+            if self.running_task_types[x.task_type] < self.get_task_type_limit(x.task_type)
+        ]
+        blocked_tasks_count = len(self.pending_tasks) - len(runnable_tasks)
+        return (
+            len(runnable_tasks) < self.get_free_workers() + self.prefetch
+            and blocked_tasks_count < self.workers + self.prefetch
+        )
+
+    def set_visibility_timeout(self, task: QueueTask, visibility_timeout: int):
+        queue = self.tasks_queues[task.queue_name]
+        queue.changeMessageVisibility(id=task.message_id, vt=visibility_timeout).exceptions(False).execute()
+        task.visible_at = time() + visibility_timeout
+
+    def refresh_pending_tasks_visibility(self):
+        with self.lock:
+            for task in self.pending_tasks:
+                if task.visible_at - time() < self.pending_visibility_timeout / 2:
+                    self.set_visibility_timeout(task, self.pending_visibility_timeout)
+
+    def release_pending_tasks(self):
+        with self.lock:
+            pending_tasks = self.pending_tasks
+            self.pending_tasks = list()
+
+        for task in pending_tasks:
+            self.set_visibility_timeout(task, 0)
+
+    def receive_tasks(
+        self,
+        get_extraction_key: Callable[[dict], Optional[str]],
+        get_coalescing_key: Optional[Callable[[dict], Optional[str]]] = None,
+    ) -> bool:
+        tasks_received = False
+        for queue_name, queue in self.tasks_queues.items():
+            with self.lock:
+                if not self.can_receive():
+                    return tasks_received
+
+            message = queue.receiveMessage(vt=self.pending_visibility_timeout).exceptions(False).execute()
+            if not message:
+                continue
+
+            tasks_received = True
+            with self.lock:
+                pending_task = next((x for x in self.pending_tasks if x.message_id == message["id"]), None)
+                if pending_task:
+                    pending_task.visible_at = time() + self.pending_visibility_timeout
+                    continue
+
+            try:
+                content = json.loads(message["message"])
+                task = QueueTask(
+                    queue_name=queue_name,
+                    message_id=message["id"],
+                    message=content,
+                    task_type=str(content.get("task", "")),
+                    extraction_key=get_extraction_key(content),
+                    coalescing_key=get_coalescing_key(content) if get_coalescing_key else None,
+                    received_at=time(),
+                    visible_at=time() + self.pending_visibility_timeout,
+                )
+            except (ValueError, AttributeError):
+                self.logger.error(f"Not a valid message: {message['message']}")
+                queue.deleteMessage(id=message["id"]).execute()
+                continue
+
+            with self.lock:
+                self.pending_tasks.append(task)
+
+        return tasks_received
+
+    def is_starving(self, task: QueueTask, now: float) -> bool:
+        return bool(self.max_wait_seconds) and now - task.received_at >= self.max_wait_seconds
+
+    def get_task_priority(self, task: QueueTask, now: float) -> tuple[int, int, float]:
+        starving = 0 if self.is_starving(task, now) else 1
+        return starving, self.task_types_priorities.get(task.task_type, 0), task.received_at
+
+    def get_tasks_to_run(self) -> list[QueueTask]:
+        if self.stopping:
+            return list()
+
+        now = time()
+        tasks_to_run: list[QueueTask] = list()
+        for task in sorted(self.get_unblocked_tasks(), key=lambda x: self.get_task_priority(x, now)):
+            if not self.get_free_workers():
+                break
+
+            if self.running_task_types[task.task_type] >= self.get_task_type_limit(task.task_type):
+                continue
+
+            duplicated_tasks = self.get_duplicated_tasks(task)
+            for pending_task in [task, *duplicated_tasks]:
+                self.pending_tasks.remove(pending_task)
+                self.add_wait_time(pending_task, now)
+
+            if self.is_starving(task, now):
+                STARVING_TASKS_PROMOTED.labels(task.task_type).inc()
+
+            self.running_task_types[task.task_type] += 1
+            if task.extraction_key:
+                self.running_extraction_keys.add(task.extraction_key)
+
+            if duplicated_tasks:
+                self.logger.info(f"Coalescing {len(duplicated_tasks) + 1} queued tasks {task.coalescing_key}")
+                task = duplicated_tasks[-1].model_copy(update={"coalesced_tasks": [task, *duplicated_tasks[:-1]]})
+
+            tasks_to_run.append(task)
+
+        return tasks_to_run
+
+    def get_duplicated_tasks(self, task: QueueTask) -> list[QueueTask]:
+        if not task.coalescing_key:
+            return list()
+
+        duplicated_tasks: list[QueueTask] = list()
+        for pending_task in self.pending_tasks[self.pending_tasks.index(task) + 1 :]:
+            if pending_task.extraction_key != task.extraction_key:
+                continue
+
+            if pending_task.coalescing_key != task.coalescing_key:
+                break
+
+            duplicated_tasks.append(pending_task)
+
+        return duplicated_tasks
+
+    def add_wait_time(self, task: QueueTask, now: float):
+        wait_times = self.wait_times.setdefault(task.task_type, deque(maxlen=self.WAIT_TIMES_SAMPLES))
+        wait_times.append(now - task.received_at)
+        QUEUE_WAIT_SECONDS.labels(task.task_type).observe(now - task.received_at)
+
+    def get_wait_times(self) -> dict[str, dict[str, float]]:
+        with self.lock:
+            wait_times = {task_type: sorted(values) for task_type, values in self.wait_times.items() if values}
+            pending = Counter(x.task_type for x in self.pending_tasks)
+
+        return {
+            task_type: {
+                "pending": pending[task_type],
+                "p50": values[len(values) // 2],
+                "p99": values[min(len(values) - 1, int(len(values) * 0.99))],
+                "max": values[-1],
+            }
+            for task_type, values in wait_times.items()
+        }
+
+    def log_wait_times(self):
+        for task_type, wait_times in self.get_wait_times().items():
+            self.logger.info(
+                f"Queue wait times for {task_type}: pending {wait_times['pending']} "
+                f"p50 {round(wait_times['p50'], 2)}s p99 {round(wait_times['p99'], 2)}s max {round(wait_times['max'], 2)}s"
+            )
+
+    def finish_task(self, task: QueueTask):
+        self.running_task_types[task.task_type] -= 1
+        self.running_extraction_keys.discard(task.extraction_key)
+
+    @staticmethod
+    def get_coalesced_result(result: dict, message: dict) -> dict:
+        return {**result, "params": message.get("params")}
+
+    def run_task(
+        self,
+        task: QueueTask,
+        process: Callable[[dict], Optional[dict]],
+        executor: ThreadPoolExecutor,
+        restart_condition: Optional[Callable[[dict], bool]] = None,
+    ):
+        restart = False
+        try:
+            for started_task in [*task.coalesced_tasks, task]:
+                self.set_visibility_timeout(started_task, self.visibility_timeout)
+
+            result = process(task.message)
+            if result is not None:
+                for coalesced_task in task.coalesced_tasks:
+                    coalesced_result = self.get_coalesced_result(result, coalesced_task.message)
+                    self.results_queues[task.queue_name].sendMessage().message(json.dumps(coalesced_result)).execute()
+                self.results_queues[task.queue_name].sendMessage().message(json.dumps(result)).execute()
+            restart = restart_condition is not None and restart_condition(task.message)
+        except Exception:
+            self.logger.error(f"Error processing task {task.message}", exc_info=1)
+        finally:
+            for finished_task in [*task.coalesced_tasks, task]:
+                self.tasks_queues[finished_task.queue_name].deleteMessage(id=finished_task.message_id).exceptions(
+                    False
+                ).execute()
+            with self.lock:
+                self.finish_task(task)
+                if restart:
+                    self.logger.info(f"Restarting the worker after task {task.message}")
+                    self.stopping = True
+            self.dispatch(process, executor, restart_condition)
+
+    def dispatch(
+        self,
+        process: Callable[[dict], Optional[dict]],
+        executor: ThreadPoolExecutor,
+        restart_condition: Optional[Callable[[dict], bool]] = None,
+    ):
+        with self.lock:
+            tasks_to_run = self.get_tasks_to_run()
+
+        for task in tasks_to_run:
+            executor.submit(self.run_task, task, process, executor, restart_condition)
+
+    def start(
+        self,
+        process: Callable[[dict], Optional[dict]],
+        get_extraction_key: Callable[[dict], Optional[str]],
+        get_coalescing_key: Optional[Callable[[dict], Optional[str]]] = None,
+        restart_condition: Optional[Callable[[dict], bool]] = None,
+        get_coalesced_result: Optional[Callable[[dict, dict], dict]] = None,
+    ):
+        if get_coalesced_result:
+            self.get_coalesced_result = get_coalesced_result
+
+        self.create_queues()
+        wait_times_logged_at = time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                while not self.stopping:
+                    tasks_received = self.receive_tasks(get_extraction_key, get_coalescing_key)
+                    self.dispatch(process, executor, restart_condition)
+                    self.refresh_pending_tasks_visibility()
+                    if TASKS_WAIT_TIMES_LOG_SECONDS and time() - wait_times_logged_at >= TASKS_WAIT_TIMES_LOG_SECONDS:
+                        self.log_wait_times()
+                        wait_times_logged_at = time()
+                    if not tasks_received:
+                        sleep(self.POLLING_SECONDS)
+            finally:
+                with self.lock:
+                    self.stopping = True
+                self.release_pending_tasks()
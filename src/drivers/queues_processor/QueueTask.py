@@ -0,0 +1,15 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class QueueTask(BaseModel):
+    queue_name: str
+    message_id: str
+    message: dict
+    task_type: str
+    extraction_key: Optional[str] = None
+    coalescing_key: Optional[str] = None
+    received_at: float
+    visible_at: float = 0
+    coalesced_tasks: list["QueueTask"] = list()
@@ -1,7 +1,10 @@
 import os
+import signal
+import sys
+from functools import partial
+
 import torch
 from pydantic import ValidationError
-from queue_processor.QueueProcessor import QueueProcessor
 from sentry_sdk.integrations.redis import RedisIntegration
 import sentry_sdk
 from trainable_entity_extractor.config import config_logger
@@ -9,21 +12,73 @@ from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIde
 from trainable_entity_extractor.use_cases.send_logs import send_logs
 
 from adapters.MongoPersistenceRepository import MongoPersistenceRepository
-from config import SERVICE_HOST, SERVICE_PORT, REDIS_HOST, REDIS_PORT, QUEUES_NAMES, DATA_PATH, PARAGRAPH_EXTRACTION_NAME
+from config import (
+    SERVICE_HOST,
+    SERVICE_PORT,
+    REDIS_HOST,
+    REDIS_PORT,
+    QUEUES_NAMES,
+    DATA_PATH,
+    PARAGRAPH_EXTRACTION_NAME,
+    TASKS_WORKERS,
+    CREATE_MODEL_TASKS_LIMIT,
+    SUGGESTIONS_TASKS_LIMIT,
+    PARAGRAPH_EXTRACTION_TASKS_LIMIT,
+    CREATE_MODEL_TASKS_PRIORITY,
+    SUGGESTIONS_TASKS_PRIORITY,
+    PARAGRAPH_EXTRACTION_TASKS_PRIORITY,
+    TASKS_PREFETCH,
+    METRICS_PORT,
+    MEMORY_USAGE_IN_RESULTS,
+)
+from drivers.queues_processor.ConcurrentQueueProcessor import ConcurrentQueueProcessor
 from domain.ParagraphExtractionResultsMessage import ParagraphExtractionResultsMessage
 from domain.ParagraphExtractorTask import ParagraphExtractorTask
 from domain.TrainableEntityExtractionTask import TrainableEntityExtractionTask
 from domain.ResultsMessage import ResultsMessage
 from use_cases.Extractor import Extractor
+from use_cases.MemoryUsageTracker import MemoryUsageTracker
+from use_cases.ModelsJanitor import ModelsJanitor
+from use_cases.metrics import measure_stage, start_metrics_server
 from domain.TaskType import TaskType
+from ports.PersistenceRepository import PersistenceRepository
 
 
 def restart_condition(message: dict[str, any]) -> bool:
-    return TrainableEntityExtractionTask(**message).task == Extractor.CREATE_MODEL_TASK_NAME
+    return TaskType(**message).task == Extractor.CREATE_MODEL_TASK_NAME
+
+
+def get_extraction_key(message: dict[str, any]) -> str | None:
+    try:
+        task_type = TaskType(**message)
+    except ValidationError:
+        return None
+
+    if task_type.task == PARAGRAPH_EXTRACTION_NAME:
+        return f"{PARAGRAPH_EXTRACTION_NAME}/{message.get('key')}"
+
+    params = message.get("params") if isinstance(message.get("params"), dict) else dict()
+    return f"{message.get('tenant')}/{params.get('id')}"
+
+
+def get_coalescing_key(message: dict[str, any]) -> str | None:
+    try:
+        task = TrainableEntityExtractionTask(**message)
+    except ValidationError:
+        return None
+
+    if task.task not in [Extractor.CREATE_MODEL_TASK_NAME, Extractor.SUGGESTIONS_TASK_NAME]:
+        return None
+
+    return f"{task.tenant}/{task.params.id}/{task.task}"
 
 
-def get_paragraphs(task: ParagraphExtractorTask):
-    persistence_repository = MongoPersistenceRepository()
+def get_coalesced_result(result: dict[str, any], message: dict[str, any]) -> dict[str, any]:
+    task = TrainableEntityExtractionTask(**message)
+    return {**result, "params": task.params.model_dump()}
+
+
+def get_paragraphs(task: ParagraphExtractorTask, persistence_repository: PersistenceRepository):
     task_calculated, error_message = Extractor.calculate_task(task, persistence_repository)
 
     if not task_calculated:
@@ -34,7 +89,7 @@ def get_paragraphs(task: ParagraphExtractorTask):
     return ParagraphExtractionResultsMessage(key=task.key, xmls=task.xmls, success=True, error_message="", data_url=data_url)
 
 
-def process(message: dict[str, any]) -> dict[str, any] | None:
+def process(message: dict[str, any], persistence_repository: PersistenceRepository) -> dict[str, any] | None:
     try:
         task_type = TaskType(**message)
         config_logger.info(f"New task {message}")
@@ -44,10 +99,12 @@ def process(message: dict[str, any]) -> dict[str, any] | None:
 
     if task_type.task in [Extractor.CREATE_MODEL_TASK_NAME, Extractor.SUGGESTIONS_TASK_NAME]:
         task = TrainableEntityExtractionTask(**message)
-        result_message = get_extraction(task)
+        with measure_stage(task.task, "total"), MemoryUsageTracker() as memory_usage_tracker:
+            result_message = get_extraction(task, persistence_repository)
     elif task_type.task == PARAGRAPH_EXTRACTION_NAME:
         task = ParagraphExtractorTask(**message)
-        result_message = get_paragraphs(task)
+        with measure_stage(task.task, "total"), MemoryUsageTracker() as memory_usage_tracker:
+            result_message = get_paragraphs(task, persistence_repository)
     else:
         task = TrainableEntityExtractionTask(**message)
         result_message = ResultsMessage(
@@ -58,12 +115,20 @@ def process(message: dict[str, any]) -> dict[str, any] | None:
             error_message="Task not found",
         )
         config_logger.error(f"Task not found: {task.model_dump()}")
+        return result_message.model_dump(exclude={"memory_usage"})
+
+    memory_usage = memory_usage_tracker.memory_usage
+    send_logs(Extractor.get_extraction_identifier(task), f"Memory usage of {task.task}: {memory_usage.to_string()}")
+    if not MEMORY_USAGE_IN_RESULTS:
+        return result_message.model_dump(exclude={"memory_usage"})
 
+    result_message.memory_usage = memory_usage
     return result_message.model_dump()
 
 
-def get_extraction(task: TrainableEntityExtractionTask | ParagraphExtractorTask) -> ResultsMessage:
-    persistence_repository = MongoPersistenceRepository()
+def get_extraction(
+    task: TrainableEntityExtractionTask | ParagraphExtractorTask, persistence_repository: PersistenceRepository
+) -> ResultsMessage:
     task_calculated, error_message = Extractor.calculate_task(task, persistence_repository)
 
     model_results_message = get_result_message(error_message, task, task_calculated)
@@ -100,6 +165,46 @@ def get_result_message(error_message, task, task_calculated):
     )
 
 
+def stop_worker(*_):
+    sys.exit(0)
+
+
+def start_worker(persistence_repository: PersistenceRepository):
+    signal.signal(signal.SIGTERM, stop_worker)
+    try:
+        process_message = partial(process, persistence_repository=persistence_repository)
+        ModelsJanitor(persistence_repository).start()
+        start_metrics_server(METRICS_PORT)
+        config_logger.info(f"Waiting for messages. Is GPU used? {torch.cuda.is_available()}")
+        queues_names = QUEUES_NAMES.split(" ")
+
+        task_types_limits = {
+            Extractor.CREATE_MODEL_TASK_NAME: CREATE_MODEL_TASKS_LIMIT,
+            Extractor.SUGGESTIONS_TASK_NAME: SUGGESTIONS_TASKS_LIMIT,
+            PARAGRAPH_EXTRACTION_NAME: PARAGRAPH_EXTRACTION_TASKS_LIMIT,
+        }
+        task_types_priorities = {
+            Extractor.CREATE_MODEL_TASK_NAME: CREATE_MODEL_TASKS_PRIORITY,
+            Extractor.SUGGESTIONS_TASK_NAME: SUGGESTIONS_TASKS_PRIORITY,
+            PARAGRAPH_EXTRACTION_NAME: PARAGRAPH_EXTRACTION_TASKS_PRIORITY,
+        }
+        queue_processor = ConcurrentQueueProcessor(
+            REDIS_HOST,
+            REDIS_PORT,
+            queues_names,
+            TASKS_WORKERS,
+            task_types_limits,
+            config_logger,
+            task_types_priorities=task_types_priorities,
+            prefetch=TASKS_PREFETCH,
+        )
+        queue_processor.start(
+            process_message, get_extraction_key, get_coalescing_key, restart_condition, get_coalesced_result
+        )
+    finally:
+        persistence_repository.close()
+
+
 if __name__ == "__main__":
     try:
         sentry_sdk.init(
@@ -111,7 +216,4 @@ if __name__ == "__main__":
     except Exception:
         pass
 
-    config_logger.info(f"Waiting for messages. Is GPU used? {torch.cuda.is_available()}")
-    queues_names = QUEUES_NAMES.split(" ")
-    queue_processor = QueueProcessor(REDIS_HOST, REDIS_PORT, queues_names, config_logger)
-    queue_processor.start(process, restart_condition)
+    start_worker(MongoPersistenceRepository())
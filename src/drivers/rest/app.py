@@ -3,14 +3,19 @@ import shutil
 from contextlib import asynccontextmanager
 import json
 from os.path import join
+from time import time
+from typing import Iterator, Callable
 
+import orjson
 from queue_processor.QueueProcessor import QueueProcessor
 from trainable_entity_extractor.use_cases.XmlFile import XmlFile
 from trainable_entity_extractor.use_cases.send_logs import send_logs
 
 from adapters.MongoPersistenceRepository import MongoPersistenceRepository
 from catch_exceptions import catch_exceptions
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 import sys
 
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
@@ -20,11 +25,14 @@ from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIde
 from trainable_entity_extractor.domain.LabeledData import LabeledData
 from trainable_entity_extractor.domain.PredictionData import PredictionData
 
-from config import DATA_PATH, REDIS_HOST, REDIS_PORT, PARAGRAPH_EXTRACTION_NAME
+from config import DATA_PATH, REDIS_HOST, REDIS_PORT, PARAGRAPH_EXTRACTION_NAME, MONGO_READ_BATCH_SIZE
 from domain.ParagraphExtractionData import ParagraphExtractionData
 from domain.ParagraphExtractorTask import ParagraphExtractorTask
 from domain.XML import XML
 from drivers.rest.ParagraphsTranslations import ParagraphsTranslations
+from drivers.rest.json_items import save_json_items
+from drivers.rest.save_xml_archive import save_xml_archive
+from drivers.rest.save_xml_file import save_xml_file
 
 
 @asynccontextmanager
@@ -62,6 +70,24 @@ async def error():
     raise HTTPException(status_code=500, detail="This is a test error from the error endpoint")
 
 
+@app.get("/indexes_usage")
+@catch_exceptions
+async def indexes_usage():
+    return await run_in_threadpool(app.persistence_repository.get_indexes_usage)
+
+
+def mark_model_used(extraction_identifier: ExtractionIdentifier):
+    app.persistence_repository.update_model_registry_last_used(extraction_identifier, time())
+
+
+def save_and_mark_model_used(save_data_list: Callable) -> Callable:
+    def save_data_list_and_mark_model_used(extraction_identifier: ExtractionIdentifier, data_list: list):
+        save_data_list(extraction_identifier, data_list)
+        mark_model_used(extraction_identifier)
+
+    return save_data_list_and_mark_model_used
+
+
 @app.post("/xml_to_train/{tenant}/{extraction_id}")
 @catch_exceptions
 async def to_train_xml_file(tenant, extraction_id, file: UploadFile = File(...)):
@@ -71,7 +97,8 @@ async def to_train_xml_file(tenant, extraction_id, file: UploadFile = File(...))
         to_train=True,
         xml_file_name=filename,
     )
-    xml_file.save(file_content=file.file.read())
+    await run_in_threadpool(save_xml_file, xml_file, file.file)
+    await run_in_threadpool(mark_model_used, xml_file.extraction_identifier)
     return "xml_to_train saved"
 
 
@@ -84,10 +111,29 @@ async def to_predict_xml_file(tenant, extraction_id, file: UploadFile = File(...
         to_train=False,
         xml_file_name=filename,
     )
-    xml_file.save(file_content=file.file.read())
+    await run_in_threadpool(save_xml_file, xml_file, file.file)
+    await run_in_threadpool(mark_model_used, xml_file.extraction_identifier)
     return "xml_to_train saved"
 
 
+@app.post("/xml_archive_to_train/{tenant}/{extraction_id}")
+@catch_exceptions
+async def to_train_xml_archive(tenant, extraction_id, file: UploadFile = File(...)):
+    extraction_identifier = ExtractionIdentifier(run_name=tenant, extraction_name=extraction_id, output_path=DATA_PATH)
+    results = await run_in_threadpool(save_xml_archive, extraction_identifier, True, file.file)
+    await run_in_threadpool(mark_model_used, extraction_identifier)
+    return results
+
+
+@app.post("/xml_archive_to_predict/{tenant}/{extraction_id}")
+@catch_exceptions
+async def to_predict_xml_archive(tenant, extraction_id, file: UploadFile = File(...)):
+    extraction_identifier = ExtractionIdentifier(run_name=tenant, extraction_name=extraction_id, output_path=DATA_PATH)
+    results = await run_in_threadpool(save_xml_archive, extraction_identifier, False, file.file)
+    await run_in_threadpool(mark_model_used, extraction_identifier)
+    return results
+
+
 @app.post("/labeled_data")
 @catch_exceptions
 async def labeled_data_post(labeled_data: LabeledData):
@@ -95,34 +141,83 @@ async def labeled_data_post(labeled_data: LabeledData):
     extraction_identifier = ExtractionIdentifier(
         run_name=labeled_data.tenant, extraction_name=labeled_data.id, output_path=DATA_PATH
     )
-    app.persistence_repository.save_labeled_data(extraction_identifier, labeled_data)
+    await run_in_threadpool(app.persistence_repository.save_labeled_data, extraction_identifier, labeled_data)
+    await run_in_threadpool(mark_model_used, extraction_identifier)
     return "labeled data saved"
 
 
+def get_labeled_data(item: dict) -> LabeledData:
+    labeled_data = LabeledData(**item)
+    labeled_data.scale_down_labels()
+    return labeled_data
+
+
+@app.post("/labeled_data_list")
+@catch_exceptions
+async def labeled_data_list_post(request: Request):
+    save_labeled_data_list = save_and_mark_model_used(app.persistence_repository.save_labeled_data_list)
+    return await save_json_items(request, get_labeled_data, save_labeled_data_list)
+
+
 @app.post("/prediction_data")
 @catch_exceptions
 async def prediction_data_post(prediction_data: PredictionData):
     extraction_identifier = ExtractionIdentifier(
         run_name=prediction_data.tenant, extraction_name=prediction_data.id, output_path=DATA_PATH
     )
-    app.persistence_repository.save_prediction_data(extraction_identifier, prediction_data)
+    await run_in_threadpool(app.persistence_repository.save_prediction_data, extraction_identifier, prediction_data)
+    await run_in_threadpool(mark_model_used, extraction_identifier)
     return "prediction data saved"
 
 
+@app.post("/prediction_data_list")
+@catch_exceptions
+async def prediction_data_list_post(request: Request):
+    save_prediction_data_list = save_and_mark_model_used(app.persistence_repository.save_prediction_data_list)
+    return await save_json_items(request, lambda item: PredictionData(**item), save_prediction_data_list)
+
+
 @app.get("/get_suggestions/{run_name}/{extraction_name}")
 @catch_exceptions
 async def get_suggestions(run_name: str, extraction_name: str):
     extraction_identifier = ExtractionIdentifier(run_name=run_name, extraction_name=extraction_name, output_path=DATA_PATH)
-    suggestions = app.persistence_repository.load_suggestions(extraction_identifier)
+    suggestions = await run_in_threadpool(app.persistence_repository.load_suggestions, extraction_identifier)
     suggestions_list = [x.scale_up().to_output() for x in suggestions]
-    send_logs(extraction_identifier, f"{len(suggestions_list)} suggestions queried")
+    await run_in_threadpool(send_logs, extraction_identifier, f"{len(suggestions_list)} suggestions queried")
 
     return json.dumps(suggestions_list)
 
 
+def get_suggestions_lines(extraction_identifier: ExtractionIdentifier, limit: int) -> Iterator[bytes]:
+    suggestions_count = 0
+    suggestions_chunks = app.persistence_repository.load_suggestions_chunks(
+        extraction_identifier, MONGO_READ_BATCH_SIZE, limit
+    )
+    try:
+        for suggestions in suggestions_chunks:
+            suggestions_count += len(suggestions)
+            yield b"".join(orjson.dumps(x.scale_up().to_output()) + b"\n" for x in suggestions)
+    except Exception:
+        config_logger.error(f"Error streaming suggestions after {suggestions_count} suggestions", exc_info=1)
+        yield orjson.dumps({"error": "An error has occurred. Check graylog for more info"}) + b"\n"
+        return
+
+    send_logs(extraction_identifier, f"{suggestions_count} suggestions streamed")
+
+
+@app.get("/get_suggestions_stream/{run_name}/{extraction_name}")
+@catch_exceptions
+async def get_suggestions_stream(run_name: str, extraction_name: str, limit: int = 0):
+    extraction_identifier = ExtractionIdentifier(run_name=run_name, extraction_name=extraction_name, output_path=DATA_PATH)
+    suggestions_lines = get_suggestions_lines(extraction_identifier, limit)
+    return StreamingResponse(suggestions_lines, media_type="application/x-ndjson")
+
+
 @app.delete("/{run_name}/{extraction_name}")
 async def remove_extractor(run_name: str, extraction_name: str):
-    shutil.rmtree(join(DATA_PATH, run_name, extraction_name), ignore_errors=True)
+    await run_in_threadpool(shutil.rmtree, join(DATA_PATH, run_name, extraction_name), ignore_errors=True)
+    extraction_identifier = ExtractionIdentifier(run_name=run_name, extraction_name=extraction_name, output_path=DATA_PATH)
+    await run_in_threadpool(app.persistence_repository.delete_model_registry_entry, extraction_identifier)
     return True
 
 
@@ -137,7 +232,9 @@ async def extract_paragraphs(json_data: str = Form(...), xml_files: list[UploadF
 
     config_logger.info(f"extract_paragraphs endpoint called for {extractor_identifier.extraction_name}")
 
-    app.persistence_repository.save_paragraph_extraction_data(extractor_identifier, paragraph_extraction_data)
+    await run_in_threadpool(
+        app.persistence_repository.save_paragraph_extraction_data, extractor_identifier, paragraph_extraction_data
+    )
 
     for file in xml_files:
         xml_file = XmlFile(
@@ -145,8 +242,9 @@ async def extract_paragraphs(json_data: str = Form(...), xml_files: list[UploadF
             to_train=True,
             xml_file_name=file.filename,
         )
-        xml_file.save(file_content=file.file.read())
+        await run_in_threadpool(save_xml_file, xml_file, file.file)
 
+    await run_in_threadpool(mark_model_used, extractor_identifier)
     paragraph_extractor_task = ParagraphExtractorTask(
         task=PARAGRAPH_EXTRACTION_NAME,
         key=paragraph_extraction_data.key,
@@ -155,7 +253,8 @@ async def extract_paragraphs(json_data: str = Form(...), xml_files: list[UploadF
     config_logger.info(f"add task {paragraph_extractor_task.model_dump()}")
 
     task = paragraph_extractor_task.model_dump()
-    QueueProcessor(REDIS_HOST, REDIS_PORT, [PARAGRAPH_EXTRACTION_NAME]).send_message(task)
+    queue_processor = await run_in_threadpool(QueueProcessor, REDIS_HOST, REDIS_PORT, [PARAGRAPH_EXTRACTION_NAME])
+    await run_in_threadpool(queue_processor.send_message, task)
     return "ok"
 
 
@@ -165,5 +264,7 @@ async def get_paragraphs_translations(key: str) -> ParagraphsTranslations:
     extractor_identifier = ExtractionIdentifier(
         run_name=PARAGRAPH_EXTRACTION_NAME, extraction_name=key, output_path=DATA_PATH
     )
-    paragraphs_from_languages = app.persistence_repository.load_paragraphs_from_languages(extractor_identifier)
+    paragraphs_from_languages = await run_in_threadpool(
+        app.persistence_repository.load_paragraphs_from_languages, extractor_identifier
+    )
     return ParagraphsTranslations.from_paragraphs_from_languages(key, paragraphs_from_languages)
@@ -8,6 +8,8 @@ def catch_exceptions(func):
     async def wrapper(*args, **kwargs):
         try:
             return await func(*args, **kwargs)
+        except HTTPException:
+            raise
         except Exception:
             config_logger.error("Error see traceback", exc_info=1)
             raise HTTPException(status_code=422, detail="An error has occurred. Check graylog for more info")
@@ -0,0 +1,154 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Callable
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+
+from config import DATA_PATH, MONGO_BULK_WRITE_BATCH_SIZE
+
+NDJSON_CONTENT_TYPES = ["application/x-ndjson", "application/jsonl", "application/jsonlines"]
+
+
+def decode_json_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as error:
+        return error
+
+
+async def read_json_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield decode_json_line(line)
+
+    if buffer.strip():
+        yield decode_json_line(buffer)
+
+
+def skip_characters(buffer: str, position: int, characters: str) -> int:
+    while position < len(buffer) and buffer[position] in characters:
+        position += 1
+    return position
+
+
+async def read_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    json_decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks_iterator = chunks.__aiter__()
+    buffer = ""
+    position = 0
+    array_started = False
+    expecting_separator = False
+    items_count = 0
+    stream_finished = False
+
+    while True:
+        position = skip_characters(buffer, position, " \t\r\n")
+        if position < len(buffer):
+            if not array_started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array or a NDJSON stream")
+                array_started = True
+                position += 1
+                continue
+
+            if expecting_separator:
+                if buffer[position] == "]":
+                    return
+                if buffer[position] != ",":
+                    yield ValueError("Expected ',' or ']'. The next items were not read")
+                    return
+                expecting_separator = False
+                position += 1
+                continue
+
+            if buffer[position] == "]" and not items_count:
+                return
+
+            if buffer[position] in ",]":
+                yield ValueError("Expected a JSON value. The next items were not read")
+                return
+
+            try:
+                item, end = json_decoder.raw_decode(buffer, position)
+                if end < len(buffer) or stream_finished:
+                    position = end
+                    expecting_separator = True
+                    items_count += 1
+                    yield item
+                    continue
+            except json.JSONDecodeError as error:
+                if stream_finished:
+                    yield ValueError(f"{error}. The next items were not read")
+                    return
+
+        if stream_finished:
+            if array_started:
+                yield ValueError("Unexpected end of JSON array")
+                return
+            raise ValueError("Expected a JSON array or a NDJSON stream")
+
+        buffer = buffer[position:]
+        position = 0
+        try:
+            buffer += text_decoder.decode(await chunks_iterator.__anext__())
+        except StopAsyncIteration:
+            buffer += text_decoder.decode(b"", final=True)
+            stream_finished = True
+
+
+def read_json_items(request: Request) -> AsyncIterator[Any]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_CONTENT_TYPES:
+        return read_json_lines(request.stream())
+
+    return read_json_array(request.stream())
+
+
+async def save_data_batch(batch: list[tuple[int, BaseModel]], save_data_list: Callable) -> list[dict[str, Any]]:
+    data_by_extraction: dict[tuple[str, str], list[tuple[int, BaseModel]]] = dict()
+    for index, data in batch:
+        data_by_extraction.setdefault((data.tenant, data.id), list()).append((index, data))
+
+    errors: list[dict[str, Any]] = list()
+    for (tenant, extraction_id), indexed_data in data_by_extraction.items():
+        extraction_identifier = ExtractionIdentifier(run_name=tenant, extraction_name=extraction_id, output_path=DATA_PATH)
+        try:
+            await run_in_threadpool(save_data_list, extraction_identifier, [data for _, data in indexed_data])
+        except Exception as error:
+            errors.extend({"index": index, "error": str(error)} for index, _ in indexed_data)
+
+    return errors
+
+
+async def save_json_items(
+    request: Request, get_data: Callable[[Any], BaseModel], save_data_list: Callable
+) -> dict[str, Any]:
+    items_count = 0
+    errors: list[dict[str, Any]] = list()
+    batch: list[tuple[int, BaseModel]] = list()
+
+    async for item in read_json_items(request):
+        index = items_count
+        items_count += 1
+        try:
+            if isinstance(item, Exception):
+                raise item
+            batch.append((index, get_data(item)))
+        except Exception as error:
+            errors.append({"index": index, "error": str(error)})
+
+        if len(batch) == MONGO_BULK_WRITE_BATCH_SIZE:
+            errors.extend(await save_data_batch(batch, save_data_list))
+            batch = list()
+
+    errors.extend(await save_data_batch(batch, save_data_list))
+    errors.sort(key=lambda x: x["index"])
+    return {"saved": items_count - len(errors), "errors": errors}
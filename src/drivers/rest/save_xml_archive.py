@@ -0,0 +1,85 @@
+import io
+import os
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import BinaryIO, Iterator, Any
+
+from fastapi import HTTPException
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.use_cases.XmlFile import XmlFile
+
+from config import ARCHIVE_WRITE_WORKERS, UPLOAD_CHUNK_SIZE, ARCHIVE_MAX_FILES, ARCHIVE_MAX_UNCOMPRESSED_SIZE_MB
+from drivers.rest.save_xml_file import save_xml_file
+
+
+def get_archive_members(file: BinaryIO) -> Iterator[tuple[str, int, BinaryIO]]:
+    if zipfile.is_zipfile(file):
+        file.seek(0)
+        with zipfile.ZipFile(file) as zip_file:
+            for member in zip_file.infolist():
+                if not member.is_dir():
+                    with zip_file.open(member) as member_file:
+                        yield member.filename, member.file_size, member_file
+        return
+
+    file.seek(0)
+    with tarfile.open(fileobj=file, mode="r|*") as tar_file:
+        for member in tar_file:
+            if member.isfile():
+                yield member.name, member.size, tar_file.extractfile(member)
+
+
+def get_xml_file_name(member_name: str) -> str:
+    xml_file_name = os.path.basename(member_name)
+    return "" if xml_file_name.startswith(".") else xml_file_name
+
+
+def validate_archive(file: BinaryIO):
+    xml_files_names: set[str] = set()
+    files_count = 0
+    uncompressed_size = 0
+    for member_name, member_size, _ in get_archive_members(file):
+        files_count += 1
+        uncompressed_size += member_size
+        if files_count > ARCHIVE_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"The archive has more than {ARCHIVE_MAX_FILES} files")
+        if uncompressed_size > ARCHIVE_MAX_UNCOMPRESSED_SIZE_MB * 1024 * 1024:
+            detail = f"The archive is bigger than {ARCHIVE_MAX_UNCOMPRESSED_SIZE_MB} MB uncompressed"
+            raise HTTPException(status_code=413, detail=detail)
+
+        xml_file_name = get_xml_file_name(member_name)
+        if xml_file_name in xml_files_names:
+            raise HTTPException(status_code=400, detail=f"The archive has more than one file named {xml_file_name}")
+        if xml_file_name:
+            xml_files_names.add(xml_file_name)
+
+
+def save_xml_archive(extraction_identifier: ExtractionIdentifier, to_train: bool, file: BinaryIO) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = list()
+    futures: list[tuple[dict[str, Any], Future]] = list()
+    validate_archive(file)
+    with ThreadPoolExecutor(max_workers=ARCHIVE_WRITE_WORKERS) as executor:
+        for member_name, member_size, member_file in get_archive_members(file):
+            xml_file_name = get_xml_file_name(member_name)
+            if not xml_file_name:
+                continue
+
+            result = {"xml_file_name": xml_file_name, "success": True, "error": ""}
+            results.append(result)
+            xml_file = XmlFile(extraction_identifier=extraction_identifier, to_train=to_train, xml_file_name=xml_file_name)
+            try:
+                if member_size > UPLOAD_CHUNK_SIZE:
+                    save_xml_file(xml_file, member_file)
+                else:
+                    if len(futures) >= ARCHIVE_WRITE_WORKERS * 2:
+                        futures[-ARCHIVE_WRITE_WORKERS * 2][1].exception()
+                    futures.append((result, executor.submit(save_xml_file, xml_file, io.BytesIO(member_file.read()))))
+            except Exception as error:
+                result.update(success=False, error=str(error))
+
+        for result, future in futures:
+            if future.exception():
+                result.update(success=False, error=str(future.exception()))
+
+    return results
@@ -0,0 +1,22 @@
+import os
+import shutil
+from tempfile import NamedTemporaryFile
+from typing import BinaryIO
+
+from trainable_entity_extractor.use_cases.XmlFile import XmlFile
+
+from config import UPLOAD_CHUNK_SIZE
+
+
+def save_xml_file(xml_file: XmlFile, file: BinaryIO):
+    os.makedirs(xml_file.xml_folder_path, exist_ok=True)
+    with NamedTemporaryFile(dir=xml_file.xml_folder_path, prefix=".", suffix=".part", delete=False) as temporary_file:
+        try:
+            shutil.copyfileobj(file, temporary_file, UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            temporary_file.close()
+            os.remove(temporary_file.name)
+            raise
+
+    os.chmod(temporary_file.name, 0o644)
+    os.replace(temporary_file.name, xml_file.xml_file_path)
@@ -1,4 +1,5 @@
 from abc import abstractmethod, ABC
+from typing import Iterator, Optional
 
 from multilingual_paragraph_extractor.domain.ParagraphsFromLanguage import ParagraphsFromLanguage
 from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
@@ -6,6 +7,7 @@ from trainable_entity_extractor.domain.LabeledData import LabeledData
 from trainable_entity_extractor.domain.PredictionData import PredictionData
 from trainable_entity_extractor.domain.Suggestion import Suggestion
 
+from domain.ModelRegistryEntry import ModelRegistryEntry
 from domain.ParagraphExtractionData import ParagraphExtractionData
 
 
@@ -15,18 +17,38 @@ class PersistenceRepository(ABC):
     def close(self):
         pass
 
+    @abstractmethod
+    def get_indexes_usage(self) -> dict[str, dict[str, int]]:
+        pass
+
     @abstractmethod
     def save_prediction_data(self, extraction_identifier: ExtractionIdentifier, prediction_data: PredictionData):
         pass
 
+    @abstractmethod
+    def save_prediction_data_list(
+        self, extraction_identifier: ExtractionIdentifier, prediction_data_list: list[PredictionData]
+    ):
+        pass
+
     @abstractmethod
     def load_prediction_data(self, extraction_identifier: ExtractionIdentifier) -> list[PredictionData]:
         pass
 
+    @abstractmethod
+    def load_prediction_data_chunks(
+        self, extraction_identifier: ExtractionIdentifier, chunk_size: int
+    ) -> Iterator[list[PredictionData]]:
+        pass
+
     @abstractmethod
     def save_labeled_data(self, extraction_identifier: ExtractionIdentifier, labeled_data: LabeledData):
         pass
 
+    @abstractmethod
+    def save_labeled_data_list(self, extraction_identifier: ExtractionIdentifier, labeled_data_list: list[LabeledData]):
+        pass
+
     @abstractmethod
     def delete_labeled_data(self, extraction_identifier: ExtractionIdentifier):
         pass
@@ -36,13 +58,29 @@ class PersistenceRepository(ABC):
         pass
 
     @abstractmethod
-    def save_suggestions(self, extraction_identifier: ExtractionIdentifier, suggestions: list[Suggestion]):
+    def save_suggestions(
+        self, extraction_identifier: ExtractionIdentifier, suggestions: list[Suggestion], staging_key: Optional[str] = None
+    ):
+        pass
+
+    @abstractmethod
+    def publish_staged_suggestions(self, extraction_identifier: ExtractionIdentifier, staging_key: str):
+        pass
+
+    @abstractmethod
+    def delete_staged_suggestions(self, extraction_identifier: ExtractionIdentifier, staging_key: str):
         pass
 
     @abstractmethod
     def load_suggestions(self, extraction_identifier: ExtractionIdentifier) -> list[Suggestion]:
         pass
 
+    @abstractmethod
+    def load_suggestions_chunks(
+        self, extraction_identifier: ExtractionIdentifier, chunk_size: int, limit: int = 0
+    ) -> Iterator[list[Suggestion]]:
+        pass
+
     @abstractmethod
     def save_paragraph_extraction_data(
         self, extraction_identifier: ExtractionIdentifier, paragraph_extraction_data: ParagraphExtractionData
@@ -59,6 +97,30 @@ class PersistenceRepository(ABC):
     ):
         pass
 
+    @abstractmethod
+    def save_paragraphs_from_languages(
+        self, extraction_identifier: ExtractionIdentifier, paragraphs_from_languages: list[ParagraphsFromLanguage]
+    ):
+        pass
+
     @abstractmethod
     def load_paragraphs_from_languages(self, extraction_identifier: ExtractionIdentifier) -> list[ParagraphsFromLanguage]:
         pass
+
+    @abstractmethod
+    def save_model_registry_entry(self, model_registry_entry: ModelRegistryEntry):
+        pass
+
+    @abstractmethod
+    def update_model_registry_last_used(
+        self, extraction_identifier: ExtractionIdentifier, last_used: float, task_started_at: Optional[float] = None
+    ):
+        pass
+
+    @abstractmethod
+    def load_model_registry(self) -> list[ModelRegistryEntry]:
+        pass
+
+    @abstractmethod
+    def delete_model_registry_entry(self, extraction_identifier: ExtractionIdentifier):
+        pass
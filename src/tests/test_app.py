@@ -1,17 +1,23 @@
+import io
 import json
 import os
 import shutil
+import tarfile
+import zipfile
 from os.path import join
+from time import time
 
 import mongomock
 import pymongo
 from fastapi.testclient import TestClient
 from unittest import TestCase
+from unittest.mock import patch
 
 from trainable_entity_extractor.domain.Suggestion import Suggestion
 
 from drivers.rest.app import app
 from config import DATA_PATH, APP_PATH, MONGO_HOST, MONGO_PORT
+from use_cases.ModelsJanitor import ModelsJanitor
 
 
 class TestApp(TestCase):
@@ -23,6 +29,21 @@ class TestApp(TestCase):
 
         self.assertEqual(200, response.status_code)
 
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_indexes_usage(self):
+        indexes_stats = [
+            {"name": "_id_", "accesses": {"ops": 1}},
+            {"name": "run_name_extraction_name_id", "accesses": {"ops": 2}},
+        ]
+
+        with patch("mongomock.collection.Collection.aggregate", side_effect=lambda pipeline: iter(indexes_stats)):
+            with TestClient(app) as client:
+                response = client.get("/indexes_usage")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({"_id_": 1, "run_name_extraction_name_id": 2}, response.json()["labeled_data"])
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
     def test_post_train_xml_file(self):
         run_name = "endpoint_test"
         extraction_name = "extraction_id"
@@ -37,9 +58,34 @@ class TestApp(TestCase):
         self.assertEqual(200, response.status_code)
         to_train_xml_path = f"{DATA_PATH}/{run_name}/{extraction_name}/xml_to_train/test.xml"
         self.assertTrue(os.path.exists(to_train_xml_path))
+        self.assertEqual(0o644, os.stat(to_train_xml_path).st_mode & 0o777)
+        self.assertEqual(["test.xml"], os.listdir(f"{DATA_PATH}/{run_name}/{extraction_name}/xml_to_train"))
+
+        shutil.rmtree(join(DATA_PATH, run_name), ignore_errors=True)
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_train_xml_file_marks_the_model_as_used(self):
+        run_name = "endpoint_test"
+        extraction_name = "extraction_id"
+        shutil.rmtree(join(DATA_PATH, run_name), ignore_errors=True)
+        mongo_client = pymongo.MongoClient(f"{MONGO_HOST}:{MONGO_PORT}")
+        mongo_client.pdf_metadata_extraction.models_registry.insert_one(
+            {"run_name": run_name, "extraction_name": extraction_name, "last_used": 0, "size": 0}
+        )
+
+        with open(self.test_file_path, "rb") as stream:
+            with TestClient(app) as client:
+                response = client.post(f"/xml_to_train/{run_name}/{extraction_name}", files={"file": stream})
+                ModelsJanitor(client.app.persistence_repository, max_age_days=30).clean()
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(os.path.exists(f"{DATA_PATH}/{run_name}/{extraction_name}/xml_to_train/test.xml"))
+        registry_entry = mongo_client.pdf_metadata_extraction.models_registry.find_one({"run_name": run_name})
+        self.assertLess(time() - registry_entry["last_used"], 60)
 
         shutil.rmtree(join(DATA_PATH, run_name), ignore_errors=True)
 
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
     def test_post_xml_to_predict(self):
         tenant = "endpoint_test"
         extraction_id = "extraction_id"
@@ -57,6 +103,89 @@ class TestApp(TestCase):
 
         shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
 
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_xml_archive_to_train(self):
+        tenant = "endpoint_test"
+        extraction_id = "extraction_id"
+
+        shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar_file:
+            tar_file.add(self.test_file_path, arcname="folder/test.xml")
+            tar_file.add(self.test_file_path, arcname="other_test.xml")
+        archive.seek(0)
+
+        with TestClient(app) as client:
+            response = client.post(f"/xml_archive_to_train/{tenant}/{extraction_id}", files={"file": archive})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(["test.xml", "other_test.xml"], [x["xml_file_name"] for x in response.json()])
+        self.assertTrue(all(x["success"] for x in response.json()))
+        to_train_xml_folder = f"{DATA_PATH}/{tenant}/{extraction_id}/xml_to_train"
+        self.assertEqual(["other_test.xml", "test.xml"], sorted(os.listdir(to_train_xml_folder)))
+
+        shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
+    def test_post_xml_archive_with_duplicated_file_names(self):
+        tenant = "endpoint_test"
+        extraction_id = "extraction_id"
+
+        shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode="w:gz") as tar_file:
+            tar_file.add(self.test_file_path, arcname="folder/test.xml")
+            tar_file.add(self.test_file_path, arcname="other_folder/test.xml")
+        archive.seek(0)
+
+        with TestClient(app) as client:
+            response = client.post(f"/xml_archive_to_train/{tenant}/{extraction_id}", files={"file": archive})
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn("test.xml", response.json()["detail"])
+        self.assertFalse(os.path.exists(f"{DATA_PATH}/{tenant}/{extraction_id}/xml_to_train"))
+
+    @patch("drivers.rest.save_xml_archive.ARCHIVE_MAX_FILES", 1)
+    def test_post_xml_archive_with_too_many_files(self):
+        tenant = "endpoint_test"
+        extraction_id = "extraction_id"
+
+        shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, mode="w") as zip_file:
+            zip_file.write(self.test_file_path, arcname="test.xml")
+            zip_file.write(self.test_file_path, arcname="other_test.xml")
+        archive.seek(0)
+
+        with TestClient(app) as client:
+            response = client.post(f"/xml_archive_to_predict/{tenant}/{extraction_id}", files={"file": archive})
+
+        self.assertEqual(413, response.status_code)
+        self.assertFalse(os.path.exists(f"{DATA_PATH}/{tenant}/{extraction_id}/xml_to_predict"))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_xml_archive_to_predict(self):
+        tenant = "endpoint_test"
+        extraction_id = "extraction_id"
+
+        shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, mode="w") as zip_file:
+            zip_file.write(self.test_file_path, arcname="test.xml")
+        archive.seek(0)
+
+        with TestClient(app) as client:
+            response = client.post(f"/xml_archive_to_predict/{tenant}/{extraction_id}", files={"file": archive})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([{"xml_file_name": "test.xml", "success": True, "error": ""}], response.json())
+        self.assertTrue(os.path.exists(f"{DATA_PATH}/{tenant}/{extraction_id}/xml_to_predict/test.xml"))
+
+        shutil.rmtree(join(DATA_PATH, tenant), ignore_errors=True)
+
     @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
     def test_post_labeled_data(self):
         tenant = "endpoint_test"
@@ -229,6 +358,85 @@ class TestApp(TestCase):
             labeled_data_document["label_segments_boxes"],
         )
 
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_labeled_data_list(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+
+        labeled_data_list = [
+            {
+                "tenant": "endpoint_test",
+                "id": f"extraction_id_{i % 2}",
+                "xml_file_name": f"xml_file_name_{i}",
+                "language_iso": "en",
+                "label_text": f"text_{i}",
+                "page_width": 1,
+                "page_height": 1,
+                "xml_segments_boxes": [],
+                "label_segments_boxes": [],
+            }
+            for i in range(4)
+        ]
+        labeled_data_list.insert(2, {"tenant": "endpoint_test"})
+
+        with TestClient(app) as client:
+            response = client.post("/labeled_data_list", json=labeled_data_list)
+
+        labeled_data_collection = mongo_client.pdf_metadata_extraction.labeled_data
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(4, response.json()["saved"])
+        self.assertEqual([2], [x["index"] for x in response.json()["errors"]])
+        self.assertEqual(2, labeled_data_collection.count_documents({"extraction_name": "extraction_id_0"}))
+        self.assertEqual(2, labeled_data_collection.count_documents({"extraction_name": "extraction_id_1"}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_labeled_data_list_with_a_missing_comma(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        labeled_data = {
+            "tenant": "endpoint_test",
+            "id": "extraction_id",
+            "xml_file_name": "xml_file_name",
+            "language_iso": "en",
+            "label_text": "text",
+            "page_width": 1,
+            "page_height": 1,
+            "xml_segments_boxes": [],
+            "label_segments_boxes": [],
+        }
+        content = "[" + json.dumps(labeled_data) + "," + json.dumps(labeled_data) + json.dumps(labeled_data) + "]"
+
+        with TestClient(app) as client:
+            response = client.post("/labeled_data_list", content=content, headers={"Content-Type": "application/json"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.json()["saved"])
+        self.assertEqual([2], [x["index"] for x in response.json()["errors"]])
+        self.assertEqual(2, mongo_client.pdf_metadata_extraction.labeled_data.count_documents({}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_labeled_data_list_ndjson(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+
+        labeled_data = {
+            "tenant": "endpoint_test",
+            "id": "extraction_id",
+            "xml_file_name": "xml_file_name",
+            "language_iso": "en",
+            "label_text": "text",
+            "page_width": 1,
+            "page_height": 1,
+            "xml_segments_boxes": [],
+            "label_segments_boxes": [],
+        }
+        content = "\n".join([json.dumps(labeled_data), "not json", json.dumps(labeled_data)])
+
+        with TestClient(app) as client:
+            response = client.post("/labeled_data_list", content=content, headers={"Content-Type": "application/x-ndjson"})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.json()["saved"])
+        self.assertEqual([1], [x["index"] for x in response.json()["errors"]])
+        self.assertEqual(2, mongo_client.pdf_metadata_extraction.labeled_data.count_documents({}))
+
     @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
     def test_post_prediction_data(self):
         tenant = "endpoint_test"
@@ -283,6 +491,32 @@ class TestApp(TestCase):
             prediction_data_document["xml_segments_boxes"],
         )
 
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_post_prediction_data_list(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+
+        prediction_data_list = [
+            {
+                "tenant": "endpoint_test",
+                "id": "extraction_id",
+                "xml_file_name": f"xml_file_name_{i}",
+                "page_width": 612,
+                "page_height": 792,
+                "xml_segments_boxes": [],
+            }
+            for i in range(3)
+        ]
+        prediction_data_list.append({"id": "extraction_id", "xml_segments_boxes": "not a list"})
+
+        with TestClient(app) as client:
+            response = client.post("/prediction_data_list", json=prediction_data_list)
+
+        documents = mongo_client.pdf_metadata_extraction.prediction_data.find({}, sort=[("xml_file_name", 1)])
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, response.json()["saved"])
+        self.assertEqual([3], [x["index"] for x in response.json()["errors"]])
+        self.assertEqual([f"xml_file_name_{i}" for i in range(3)], [x["xml_file_name"] for x in documents])
+
     @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
     def test_get_suggestions(self):
         print(f"mongodb://{MONGO_HOST}:{MONGO_PORT}")
@@ -515,6 +749,74 @@ class TestApp(TestCase):
         self.assertEqual(tenant + "2", suggestion.tenant)
         self.assertEqual(extraction_id, suggestion.id)
 
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_get_suggestions_stream(self):
+        tenant = "example_tenant_name"
+        extraction_id = "prediction_extraction_id"
+
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+
+        json_data = [
+            {
+                "run_name": tenant,
+                "extraction_name": extraction_id,
+                "tenant": tenant,
+                "id": extraction_id,
+                "xml_file_name": f"file_name_{i}",
+                "text": f"text_predicted_{i}",
+                "segment_text": f"segment_text_{i}",
+                "page_number": i,
+                "segments_boxes": [
+                    {"left": 3, "top": 2, "width": 3, "height": 4, "page_width": 5, "page_height": 6, "page_number": i}
+                ],
+            }
+            for i in range(3)
+        ]
+
+        mongo_client.pdf_metadata_extraction.suggestions.insert_many(json_data)
+
+        with TestClient(app) as client:
+            first_response = client.get(f"/get_suggestions_stream/{tenant}/{extraction_id}?limit=2")
+            second_response = client.get(f"/get_suggestions_stream/{tenant}/{extraction_id}?limit=2")
+            third_response = client.get(f"/get_suggestions_stream/{tenant}/{extraction_id}?limit=2")
+
+        first_suggestions = [json.loads(x) for x in first_response.text.splitlines()]
+        second_suggestions = [json.loads(x) for x in second_response.text.splitlines()]
+
+        self.assertEqual(200, first_response.status_code)
+        self.assertEqual("application/x-ndjson", first_response.headers["content-type"])
+        self.assertEqual(["file_name_0", "file_name_1"], [x["xml_file_name"] for x in first_suggestions])
+        self.assertEqual(["file_name_2"], [x["xml_file_name"] for x in second_suggestions])
+        self.assertEqual("text_predicted_2", second_suggestions[0]["text"])
+        self.assertEqual(4, second_suggestions[0]["segments_boxes"][0]["left"])
+        self.assertEqual("", third_response.text)
+        self.assertEqual(0, mongo_client.pdf_metadata_extraction.suggestions.count_documents({}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_get_suggestions_stream_error(self):
+        tenant = "example_tenant_name"
+        extraction_id = "prediction_extraction_id"
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        suggestion = Suggestion(
+            tenant=tenant,
+            id=extraction_id,
+            xml_file_name="file_name",
+            text="text_predicted",
+            segment_text="segment_text",
+            page_number=1,
+            segments_boxes=[],
+        )
+        suggestion_document = {"run_name": tenant, "extraction_name": extraction_id, **suggestion.model_dump()}
+        mongo_client.pdf_metadata_extraction.suggestions.insert_one(suggestion_document)
+
+        with patch.object(Suggestion, "to_output", side_effect=ValueError("Broken suggestion")):
+            with TestClient(app) as client:
+                response = client.get(f"/get_suggestions_stream/{tenant}/{extraction_id}")
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn("error", json.loads(response.text.splitlines()[-1]))
+        self.assertEqual(1, mongo_client.pdf_metadata_extraction.suggestions.count_documents({"claim": {"$exists": False}}))
+
     @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
     def test_get_suggestions_when_no_suggestions(self):
         with TestClient(app) as client:
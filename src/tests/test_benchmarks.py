@@ -0,0 +1,29 @@
+import argparse
+from unittest import TestCase
+
+from benchmarks.run_benchmarks import run_benchmarks, TASKS_NAMES
+
+
+class TestBenchmarks(TestCase):
+    def test_run_benchmarks_with_stub_backend(self):
+        arguments = argparse.Namespace(
+            documents=3,
+            pages=2,
+            tokens_per_page=50,
+            seed=0,
+            backend="stub",
+            tasks=TASKS_NAMES,
+            pdf_data_cache=False,
+            trace_python_allocations=False,
+            output=None,
+        )
+
+        benchmark_results = run_benchmarks(arguments)
+
+        self.assertEqual(set(TASKS_NAMES), set(benchmark_results["results"]))
+        for task_name in TASKS_NAMES:
+            task_results = benchmark_results["results"][task_name]
+            self.assertTrue(task_results["success"], task_results["error_message"])
+            self.assertEqual(3, task_results["documents"])
+            self.assertEqual(1, task_results["stages"]["parse"]["count"])
+            self.assertLess(0, task_results["memory_usage"]["peak_rss_mb"])
@@ -0,0 +1,200 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from unittest import TestCase
+
+from prometheus_client import REGISTRY
+
+from trainable_entity_extractor.config import config_logger
+
+from drivers.queues_processor.ConcurrentQueueProcessor import ConcurrentQueueProcessor
+from drivers.queues_processor.QueueTask import QueueTask
+
+
+class QueueCommand:
+    def __init__(self, queue: "FakeQueue", name: str, **kwargs):
+        self.queue = queue
+        self.name = name
+        self.kwargs = kwargs
+
+    def message(self, message: str):
+        self.kwargs["message"] = message
+        return self
+
+    def exceptions(self, exceptions: bool):
+        return self
+
+    def execute(self):
+        self.queue.calls.append((self.name, self.kwargs))
+        if self.name == "receiveMessage" and self.queue.messages:
+            return self.queue.messages.pop(0)
+        return None
+
+
+class FakeQueue:
+    def __init__(self, messages: list[dict] = None):
+        self.messages = messages or list()
+        self.calls: list[tuple[str, dict]] = list()
+
+    def __getattr__(self, name: str):
+        return lambda **kwargs: QueueCommand(self, name, **kwargs)
+
+
+class TestConcurrentQueueProcessor(TestCase):
+    @staticmethod
+    def get_queue_processor(workers: int, task_types_limits: dict[str, int]) -> ConcurrentQueueProcessor:
+        return ConcurrentQueueProcessor(
+            "127.0.0.1", "6379", ["information_extraction"], workers, task_types_limits, config_logger
+        )
+
+    @staticmethod
+    def get_task(message_id: str, task_type: str, extraction_key: str) -> QueueTask:
+        return QueueTask(
+            queue_name="information_extraction",
+            message_id=message_id,
+            message={"task": task_type, "params": {"id": message_id}},
+            task_type=task_type,
+            extraction_key=extraction_key,
+            coalescing_key=f"{extraction_key}/{task_type}",
+            received_at=time(),
+        )
+
+    def test_get_tasks_to_run_respects_task_types_limits(self):
+        queue_processor = self.get_queue_processor(3, {"create_model": 1})
+        queue_processor.pending_tasks = [
+            self.get_task("1", "create_model", "tenant/a"),
+            self.get_task("2", "create_model", "tenant/b"),
+            self.get_task("3", "suggestions", "tenant/c"),
+            self.get_task("4", "suggestions", "tenant/d"),
+            self.get_task("5", "suggestions", "tenant/e"),
+        ]
+
+        tasks_to_run = queue_processor.get_tasks_to_run()
+
+        self.assertEqual(["1", "3", "4"], [x.message_id for x in tasks_to_run])
+        self.assertEqual(["2", "5"], [x.message_id for x in queue_processor.pending_tasks])
+
+    def test_get_tasks_to_run_keeps_order_for_each_extraction(self):
+        queue_processor = self.get_queue_processor(4, {"create_model": 1})
+        queue_processor.running_task_types["create_model"] = 1
+        queue_processor.running_extraction_keys.add("tenant/other")
+        queue_processor.pending_tasks = [
+            self.get_task("1", "create_model", "tenant/a"),
+            self.get_task("2", "suggestions", "tenant/a"),
+            self.get_task("3", "suggestions", "tenant/other"),
+            self.get_task("4", "suggestions", "tenant/b"),
+        ]
+
+        tasks_to_run = queue_processor.get_tasks_to_run()
+
+        self.assertEqual(["4"], [x.message_id for x in tasks_to_run])
+
+        queue_processor.finish_task(self.get_task("0", "create_model", "tenant/other"))
+        tasks_to_run = queue_processor.get_tasks_to_run()
+
+        self.assertEqual(["1", "3"], [x.message_id for x in tasks_to_run])
+
+    @staticmethod
+    def get_metric_value(name: str, task_type: str) -> float:
+        return REGISTRY.get_sample_value(name, {"task_type": task_type}) or 0
+
+    def test_get_tasks_to_run_by_priority_without_starving(self):
+        promoted_metric = "pdf_metadata_extraction_starving_tasks_promoted_total"
+        waits_metric = "pdf_metadata_extraction_queue_wait_seconds_count"
+        promoted_before = self.get_metric_value(promoted_metric, "create_model")
+        waits_before = self.get_metric_value(waits_metric, "suggestions")
+        queue_processor = self.get_queue_processor(1, {"create_model": 1})
+        queue_processor.task_types_priorities = {"create_model": 1, "suggestions": 0}
+        queue_processor.max_wait_seconds = 60
+        queue_processor.pending_tasks = [
+            self.get_task("1", "create_model", "tenant/a"),
+            self.get_task("2", "suggestions", "tenant/b"),
+        ]
+
+        self.assertEqual(["2"], [x.message_id for x in queue_processor.get_tasks_to_run()])
+
+        queue_processor.finish_task(self.get_task("2", "suggestions", "tenant/b"))
+        queue_processor.pending_tasks[0].received_at -= 120
+        queue_processor.pending_tasks.append(self.get_task("3", "suggestions", "tenant/c"))
+
+        self.assertEqual(["1"], [x.message_id for x in queue_processor.get_tasks_to_run()])
+        self.assertEqual(["create_model", "suggestions"], sorted(queue_processor.get_wait_times()))
+        self.assertEqual(1, self.get_metric_value(promoted_metric, "create_model") - promoted_before)
+        self.assertEqual(1, self.get_metric_value(waits_metric, "suggestions") - waits_before)
+
+    def test_get_tasks_to_run_coalesces_consecutive_duplicates(self):
+        queue_processor = self.get_queue_processor(2, {"create_model": 1})
+        queue_processor.pending_tasks = [
+            self.get_task("1", "create_model", "tenant/a"),
+            self.get_task("2", "create_model", "tenant/a"),
+            self.get_task("3", "suggestions", "tenant/b"),
+            self.get_task("4", "create_model", "tenant/a"),
+            self.get_task("5", "suggestions", "tenant/a"),
+            self.get_task("6", "create_model", "tenant/a"),
+        ]
+
+        tasks_to_run = queue_processor.get_tasks_to_run()
+
+        self.assertEqual(["4", "3"], [x.message_id for x in tasks_to_run])
+        self.assertEqual(["1", "2"], [x.message_id for x in tasks_to_run[0].coalesced_tasks])
+        self.assertEqual(["5", "6"], [x.message_id for x in queue_processor.pending_tasks])
+        coalesced_result = queue_processor.get_coalesced_result(
+            {"success": True, "params": {"id": "4"}}, {"params": {"id": "1"}}
+        )
+        self.assertEqual({"success": True, "params": {"id": "1"}}, coalesced_result)
+
+    def test_receive_tasks_does_not_prefetch_past_free_workers(self):
+        queue_processor = self.get_queue_processor(2, {"create_model": 1})
+        queue_processor.pending_visibility_timeout = 60
+        messages = [{"id": str(x), "message": json.dumps({"task": "suggestions"})} for x in range(4)]
+        queue = FakeQueue(messages)
+        queue_processor.tasks_queues = {"information_extraction": queue}
+
+        queue_processor.receive_tasks(lambda x: None)
+        queue_processor.receive_tasks(lambda x: None)
+        queue_processor.receive_tasks(lambda x: None)
+
+        self.assertEqual(["0", "1"], [x.message_id for x in queue_processor.pending_tasks])
+        self.assertEqual([{"vt": 60}, {"vt": 60}], [kwargs for name, kwargs in queue.calls if name == "receiveMessage"])
+
+    def test_run_task_extends_visibility_and_stops_on_restart_condition(self):
+        queue_processor = self.get_queue_processor(1, {"create_model": 1})
+        queue_processor.visibility_timeout = 3600
+        tasks_queue = FakeQueue()
+        results_queue = FakeQueue()
+        queue_processor.tasks_queues = {"information_extraction": tasks_queue}
+        queue_processor.results_queues = {"information_extraction": results_queue}
+        task = self.get_task("1", "create_model", "tenant/a")
+        queue_processor.pending_tasks = [self.get_task("2", "suggestions", "tenant/b")]
+        queue_processor.running_task_types["create_model"] = 1
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            queue_processor.run_task(task, lambda x: {"success": True}, executor, lambda x: x["task"] == "create_model")
+
+        self.assertEqual(("changeMessageVisibility", {"id": "1", "vt": 3600}), tasks_queue.calls[0])
+        self.assertEqual(("deleteMessage", {"id": "1"}), tasks_queue.calls[-1])
+        self.assertEqual(1, len(results_queue.calls))
+        self.assertTrue(queue_processor.stopping)
+        self.assertEqual([], queue_processor.get_tasks_to_run())
+        self.assertFalse(queue_processor.can_receive())
+
+        queue_processor.release_pending_tasks()
+
+        self.assertEqual([], queue_processor.pending_tasks)
+        self.assertEqual(("changeMessageVisibility", {"id": "2", "vt": 0}), tasks_queue.calls[-1])
+
+    def test_run_task_sends_each_coalesced_task_its_own_params(self):
+        queue_processor = self.get_queue_processor(1, {"create_model": 1})
+        results_queue = FakeQueue()
+        queue_processor.tasks_queues = {"information_extraction": FakeQueue()}
+        queue_processor.results_queues = {"information_extraction": results_queue}
+        queue_processor.pending_tasks = [self.get_task(str(x), "create_model", "tenant/a") for x in range(1, 4)]
+        queue_processor.get_coalesced_result = lambda result, message: {**result, "params": message["params"]}
+        task = queue_processor.get_tasks_to_run()[0]
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            queue_processor.run_task(task, lambda x: {"success": True, "params": x["params"]}, executor)
+
+        results = [json.loads(kwargs["message"]) for _, kwargs in results_queue.calls]
+        self.assertEqual(["1", "2", "3"], [x["params"]["id"] for x in results])
+        self.assertEqual({"id": "1"}, task.coalesced_tasks[0].message["params"])
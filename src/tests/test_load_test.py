@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+from unittest import TestCase
+
+from benchmarks.load_test_runner import run_load_test, get_mix, DEFAULT_MIX
+
+
+class TestLoadTest(TestCase):
+    def test_get_mix(self):
+        self.assertEqual({"labeled_data": 3, "get_suggestions": 1}, get_mix("labeled_data=3,get_suggestions=1"))
+        with self.assertRaises(ValueError):
+            get_mix("unknown_route=1")
+
+    def test_run_load_test_in_process(self):
+        arguments = argparse.Namespace(
+            url=None,
+            local_mongo=False,
+            mix=DEFAULT_MIX,
+            concurrency=[1, 4],
+            requests=20,
+            pages=1,
+            tokens_per_page=20,
+            seed=0,
+            timeout=60,
+            output=None,
+        )
+
+        load_test_results = asyncio.run(run_load_test(arguments))
+
+        self.assertEqual([1, 4], [x["concurrency"] for x in load_test_results["levels"]])
+        for level in load_test_results["levels"]:
+            self.assertEqual(20, level["requests"])
+            self.assertEqual(0, level["errors"])
+            self.assertEqual(20, sum(x["requests"] for x in level["routes"].values()))
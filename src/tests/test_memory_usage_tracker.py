@@ -0,0 +1,36 @@
+import tracemalloc
+from unittest import TestCase
+
+from use_cases.MemoryUsageTracker import MemoryUsageTracker
+
+
+class TestMemoryUsageTracker(TestCase):
+    def tearDown(self):
+        tracemalloc.stop()
+
+    def test_memory_usage(self):
+        with MemoryUsageTracker(trace_python_allocations=True) as memory_usage_tracker:
+            data = bytearray(20 * MemoryUsageTracker.MB)
+
+        self.assertEqual(20 * MemoryUsageTracker.MB, len(data))
+        self.assertLessEqual(20, memory_usage_tracker.memory_usage.peak_rss_mb)
+        self.assertLessEqual(20, memory_usage_tracker.memory_usage.python_peak_mb)
+
+    def test_memory_usage_without_tracing_python_allocations(self):
+        with MemoryUsageTracker(trace_python_allocations=False) as memory_usage_tracker:
+            pass
+
+        self.assertLess(0, memory_usage_tracker.memory_usage.peak_rss_mb)
+        self.assertIsNone(memory_usage_tracker.memory_usage.python_peak_mb)
+
+    def test_process_wide_memory_usage_keeps_the_peak_of_other_tasks(self):
+        with MemoryUsageTracker(trace_python_allocations=True, process_wide=True):
+            data = bytearray(20 * MemoryUsageTracker.MB)
+            del data
+
+        with MemoryUsageTracker(trace_python_allocations=True, process_wide=True) as memory_usage_tracker:
+            pass
+
+        self.assertTrue(memory_usage_tracker.memory_usage.process_wide)
+        self.assertLessEqual(20, memory_usage_tracker.memory_usage.python_peak_mb)
+        self.assertTrue(memory_usage_tracker.memory_usage.to_string().startswith("process-wide"))
@@ -0,0 +1,20 @@
+from unittest import TestCase
+
+from prometheus_client import REGISTRY, generate_latest
+
+from use_cases.metrics import measure_iterator, measure_stage
+
+
+class TestMetrics(TestCase):
+    def test_measure_stage(self):
+        with measure_stage("test_task", "test_stage"):
+            pass
+
+        self.assertIn('stage="test_stage",task="test_task"', generate_latest().decode())
+
+    def test_measure_iterator(self):
+        items = list(measure_iterator("test_task", "test_iterator", iter([1, 2, 3])))
+
+        labels = {"task": "test_task", "stage": "test_iterator"}
+        self.assertEqual([1, 2, 3], items)
+        self.assertEqual(3, REGISTRY.get_sample_value("pdf_metadata_extraction_stage_seconds_count", labels))
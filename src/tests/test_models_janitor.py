@@ -0,0 +1,100 @@
+import os
+import shutil
+from os.path import join
+from time import time
+from unittest import TestCase
+
+import mongomock
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+
+from adapters.MongoPersistenceRepository import MongoPersistenceRepository
+from config import DATA_PATH
+from domain.ModelRegistryEntry import ModelRegistryEntry
+from use_cases.ModelsJanitor import ModelsJanitor
+
+
+class TestModelsJanitor(TestCase):
+    run_name = "janitor_test"
+
+    def tearDown(self):
+        shutil.rmtree(join(DATA_PATH, self.run_name), ignore_errors=True)
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_get_entries_to_remove_by_age_and_quota(self):
+        now = time()
+        day = 24 * 3600
+        entries = [
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="old", last_used=now - 40 * day, size=1),
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="least_used", last_used=now - 3 * day, size=600),
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="less_used", last_used=now - 2 * day, size=600),
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="recent", last_used=now - day, size=600),
+        ]
+        models_janitor = ModelsJanitor(MongoPersistenceRepository(), max_age_days=30, disk_quota_gb=1300 / 1024**3)
+
+        entries_to_remove = models_janitor.get_entries_to_remove(entries, now)
+
+        self.assertEqual(["old", "least_used"], [x.extraction_name for x in entries_to_remove])
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_get_entries_to_remove_skips_tasks_in_progress(self):
+        now = time()
+        day = 24 * 3600
+        entries = [
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="old", last_used=now - 40 * day, size=1),
+            ModelRegistryEntry(
+                run_name=self.run_name, extraction_name="training", last_used=now - 40 * day, size=600, task_started_at=now
+            ),
+            ModelRegistryEntry(
+                run_name=self.run_name,
+                extraction_name="stale_task",
+                last_used=now - 40 * day,
+                size=1,
+                task_started_at=now - 2 * day,
+            ),
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="least_used", last_used=now - 3 * day, size=600),
+            ModelRegistryEntry(run_name=self.run_name, extraction_name="recent", last_used=now - day, size=600),
+        ]
+        models_janitor = ModelsJanitor(
+            MongoPersistenceRepository(), max_age_days=30, disk_quota_gb=1300 / 1024**3, task_timeout_seconds=day
+        )
+
+        entries_to_remove = models_janitor.get_entries_to_remove(entries, now)
+
+        self.assertEqual(["old", "stale_task", "least_used"], [x.extraction_name for x in entries_to_remove])
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_clean(self):
+        persistence_repository = MongoPersistenceRepository()
+        for extraction_name in ["old_model", "new_model"]:
+            os.makedirs(join(DATA_PATH, self.run_name, extraction_name, "model"), exist_ok=True)
+            with open(join(DATA_PATH, self.run_name, extraction_name, "model", "model.bin"), "wb") as file:
+                file.write(b"model")
+
+        models_janitor = ModelsJanitor(persistence_repository, max_age_days=30)
+        models_janitor.register_unknown_models()
+        old_model = ExtractionIdentifier(run_name=self.run_name, extraction_name="old_model", output_path=DATA_PATH)
+        persistence_repository.update_model_registry_last_used(old_model, 0)
+
+        models_janitor.clean()
+
+        registry = {x.extraction_name: x for x in persistence_repository.load_model_registry()}
+        self.assertFalse(os.path.exists(join(DATA_PATH, self.run_name, "old_model")))
+        self.assertTrue(os.path.exists(join(DATA_PATH, self.run_name, "new_model")))
+        self.assertNotIn("old_model", registry)
+        self.assertEqual(5, registry["new_model"].size)
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_clean_keeps_models_used_after_the_last_task(self):
+        persistence_repository = MongoPersistenceRepository()
+        os.makedirs(join(DATA_PATH, self.run_name, "uploaded_model", "xml_to_train"), exist_ok=True)
+        uploaded_model = ExtractionIdentifier(
+            run_name=self.run_name, extraction_name="uploaded_model", output_path=DATA_PATH
+        )
+        persistence_repository.update_model_registry_last_used(uploaded_model, 0, 0)
+
+        persistence_repository.update_model_registry_last_used(uploaded_model, time())
+        ModelsJanitor(persistence_repository, max_age_days=30).clean()
+
+        registry = {x.extraction_name: x for x in persistence_repository.load_model_registry()}
+        self.assertTrue(os.path.exists(join(DATA_PATH, self.run_name, "uploaded_model")))
+        self.assertEqual(0, registry["uploaded_model"].task_started_at)
@@ -0,0 +1,217 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import mongomock
+import pymongo
+from pymongo.errors import ServerSelectionTimeoutError
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.Suggestion import Suggestion
+
+from adapters.MongoPersistenceRepository import MongoPersistenceRepository
+from config import DATA_PATH
+
+
+class TestMongoPersistenceRepository(TestCase):
+    tenant = "repository_test"
+    extraction_id = "extraction_id"
+
+    def get_prediction_data_documents(self, amount: int, tenant: str = tenant) -> list[dict]:
+        return [
+            {
+                "run_name": tenant,
+                "extraction_name": self.extraction_id,
+                "tenant": tenant,
+                "id": self.extraction_id,
+                "xml_file_name": f"file_{i}.xml",
+                "page_width": 612,
+                "page_height": 792,
+                "xml_segments_boxes": [],
+            }
+            for i in range(amount)
+        ]
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_create_indexes(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        outdated_index = [("run_name", pymongo.ASCENDING), ("extraction_name", pymongo.ASCENDING)]
+        mongo_client.pdf_metadata_extraction.suggestions.create_index(outdated_index, name="run_name_extraction_name")
+
+        MongoPersistenceRepository().indexes_thread.join()
+        MongoPersistenceRepository().indexes_thread.join()
+
+        for collection_name in MongoPersistenceRepository.COLLECTIONS_NAMES:
+            indexes = mongo_client.pdf_metadata_extraction[collection_name].index_information()
+            self.assertEqual(2, len(indexes))
+            self.assertEqual(
+                [("run_name", 1), ("extraction_name", 1), ("_id", 1)],
+                indexes[MongoPersistenceRepository.EXTRACTION_INDEX_NAME]["key"],
+            )
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_drain_pages_use_the_extraction_index(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        mongo_client.pdf_metadata_extraction.prediction_data.insert_many(self.get_prediction_data_documents(3))
+        extraction_identifier = ExtractionIdentifier(
+            run_name=self.tenant, extraction_name=self.extraction_id, output_path=DATA_PATH
+        )
+        mongo_persistence_repository = MongoPersistenceRepository()
+        mongo_persistence_repository.indexes_thread.join()
+
+        with patch("mongomock.collection.Cursor.hint", autospec=True, side_effect=lambda cursor, index: cursor) as hint:
+            documents = list(mongo_persistence_repository.drain(extraction_identifier, "prediction_data", 2))
+
+        self.assertEqual(3, sum(len(batch) for batch in documents))
+        self.assertEqual(3, hint.call_count)
+        self.assertEqual({MongoPersistenceRepository.EXTRACTION_INDEX_NAME}, {x.args[1] for x in hint.call_args_list})
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    @patch.object(MongoPersistenceRepository, "CREATE_INDEXES_RETRY_SECONDS", 0.01)
+    def test_create_indexes_retries_in_the_background(self):
+        create_indexes_results = [ServerSelectionTimeoutError("Mongo is not ready"), None]
+        with patch.object(
+            MongoPersistenceRepository, "create_indexes", side_effect=create_indexes_results
+        ) as create_indexes:
+            mongo_persistence_repository = MongoPersistenceRepository()
+            mongo_persistence_repository.indexes_thread.join(timeout=5)
+
+        self.assertEqual(2, create_indexes.call_count)
+        self.assertFalse(mongo_persistence_repository.indexes_thread.is_alive())
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_load_prediction_data_chunks(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        prediction_data_collection = mongo_client.pdf_metadata_extraction.prediction_data
+        prediction_data_collection.insert_many(self.get_prediction_data_documents(5))
+        prediction_data_collection.insert_many(self.get_prediction_data_documents(2, "other_tenant"))
+
+        extraction_identifier = ExtractionIdentifier(
+            run_name=self.tenant, extraction_name=self.extraction_id, output_path=DATA_PATH
+        )
+        chunks = list(MongoPersistenceRepository().load_prediction_data_chunks(extraction_identifier, 2))
+
+        self.assertEqual([2, 2, 1], [len(x) for x in chunks])
+        self.assertEqual([f"file_{i}.xml" for i in range(5)], [x.xml_file_name for chunk in chunks for x in chunk])
+        self.assertEqual(0, prediction_data_collection.count_documents({"run_name": self.tenant}))
+        self.assertEqual(2, prediction_data_collection.count_documents({}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_save_suggestions_in_batches(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        extraction_identifier = ExtractionIdentifier(
+            run_name=self.tenant, extraction_name=self.extraction_id, output_path=DATA_PATH
+        )
+        suggestions = [
+            Suggestion(
+                tenant=self.tenant,
+                id=self.extraction_id,
+                xml_file_name=f"file_{i}.xml",
+                text=f"text_{i}",
+                segment_text=f"segment_text_{i}",
+                page_number=1,
+                segments_boxes=[],
+            )
+            for i in range(5)
+        ]
+
+        MongoPersistenceRepository(bulk_write_batch_size=2).save_suggestions(extraction_identifier, suggestions)
+
+        documents = list(mongo_client.pdf_metadata_extraction.suggestions.find({}, sort=[("xml_file_name", 1)]))
+        self.assertEqual([f"file_{i}.xml" for i in range(5)], [x["xml_file_name"] for x in documents])
+        self.assertEqual({self.tenant}, {x["run_name"] for x in documents})
+        self.assertEqual({self.extraction_id}, {x["extraction_name"] for x in documents})
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_staged_suggestions_are_hidden_until_published(self):
+        extraction_identifier = ExtractionIdentifier(
+            run_name=self.tenant, extraction_name=self.extraction_id, output_path=DATA_PATH
+        )
+        suggestions = [
+            Suggestion(
+                tenant=self.tenant,
+                id=self.extraction_id,
+                xml_file_name=f"file_{i}.xml",
+                text=f"text_{i}",
+                segment_text=f"segment_text_{i}",
+                page_number=1,
+                segments_boxes=[],
+            )
+            for i in range(3)
+        ]
+        mongo_persistence_repository = MongoPersistenceRepository()
+
+        mongo_persistence_repository.save_suggestions(extraction_identifier, suggestions[:1], "failed_run")
+        mongo_persistence_repository.save_suggestions(extraction_identifier, suggestions[1:], "finished_run")
+        hidden_suggestions = mongo_persistence_repository.load_suggestions(extraction_identifier)
+        mongo_persistence_repository.delete_staged_suggestions(extraction_identifier, "failed_run")
+        mongo_persistence_repository.publish_staged_suggestions(extraction_identifier, "finished_run")
+
+        self.assertEqual([], hidden_suggestions)
+        published_suggestions = mongo_persistence_repository.load_suggestions(extraction_identifier)
+        self.assertEqual(["file_1.xml", "file_2.xml"], sorted([x.xml_file_name for x in published_suggestions]))
+        self.assertEqual([], mongo_persistence_repository.load_suggestions(extraction_identifier))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_drain_deletes_only_read_documents(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        prediction_data_collection = mongo_client.pdf_metadata_extraction.prediction_data
+        prediction_data_collection.insert_many(self.get_prediction_data_documents(5))
+        extraction_identifier = ExtractionIdentifier(
+            run_name=self.tenant, extraction_name=self.extraction_id, output_path=DATA_PATH
+        )
+
+        documents_batches = MongoPersistenceRepository().drain(extraction_identifier, "prediction_data", 2)
+        first_batch = next(documents_batches)
+        next(documents_batches)
+        documents_batches.close()
+
+        self.assertEqual(2, len(first_batch))
+        self.assertEqual(
+            {"tenant", "id", "xml_file_name", "page_width", "page_height", "xml_segments_boxes"}, set(first_batch[0])
+        )
+        self.assertEqual(3, prediction_data_collection.count_documents({}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_concurrent_drains_do_not_share_documents(self):
+        mongo_client = pymongo.MongoClient("mongodb://127.0.0.1:29017")
+        prediction_data_collection = mongo_client.pdf_metadata_extraction.prediction_data
+        prediction_data_collection.insert_many(self.get_prediction_data_documents(5))
+        extraction_identifier = ExtractionIdentifier(
+            run_name=self.tenant, extraction_name=self.extraction_id, output_path=DATA_PATH
+        )
+        mongo_persistence_repository = MongoPersistenceRepository()
+
+        first_documents_batches = mongo_persistence_repository.drain(extraction_identifier, "prediction_data", 2)
+        second_documents_batches = mongo_persistence_repository.drain(extraction_identifier, "prediction_data", 2)
+        first_batches = [next(first_documents_batches)]
+        second_batch = next(second_documents_batches)
+        first_batches.append(next(first_documents_batches))
+        second_documents_batches.close()
+
+        self.assertEqual(
+            ["file_0.xml", "file_1.xml", "file_4.xml"], [x["xml_file_name"] for batch in first_batches for x in batch]
+        )
+        self.assertEqual(["file_2.xml", "file_3.xml"], [x["xml_file_name"] for x in second_batch])
+        self.assertEqual(3, prediction_data_collection.count_documents({}))
+
+        first_documents_batches.close()
+        documents = list(mongo_persistence_repository.drain(extraction_identifier, "prediction_data", 2))
+        self.assertEqual(
+            ["file_2.xml", "file_3.xml", "file_4.xml"], [x["xml_file_name"] for batch in documents for x in batch]
+        )
+        self.assertEqual(0, prediction_data_collection.count_documents({}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    def test_get_indexes_usage(self):
+        indexes_stats = [
+            {"name": "_id_", "accesses": {"ops": 3}},
+            {"name": MongoPersistenceRepository.EXTRACTION_INDEX_NAME, "accesses": {"ops": 7}},
+        ]
+
+        with patch(
+            "mongomock.collection.Collection.aggregate", side_effect=lambda pipeline: iter(indexes_stats)
+        ) as aggregate:
+            indexes_usage = MongoPersistenceRepository().get_indexes_usage()
+
+        self.assertEqual(set(MongoPersistenceRepository.COLLECTIONS_NAMES), set(indexes_usage))
+        self.assertEqual({"_id_": 3, MongoPersistenceRepository.EXTRACTION_INDEX_NAME: 7}, indexes_usage["suggestions"])
+        aggregate.assert_called_with([{"$indexStats": {}}])
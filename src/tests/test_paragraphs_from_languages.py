@@ -0,0 +1,33 @@
+import shutil
+from unittest import TestCase
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.use_cases.XmlFile import XmlFile
+
+from config import APP_PATH, DATA_PATH
+from domain.ParagraphExtractionData import ParagraphExtractionData, XmlData
+from use_cases.Extractor import Extractor
+
+
+class TestParagraphsFromLanguages(TestCase):
+    extraction_identifier = ExtractionIdentifier(
+        run_name="paragraphs_from_languages_test", extraction_name="key", output_path=DATA_PATH
+    )
+    resources_path = f"{APP_PATH}/tests/resources/tenant_test/extraction_id/xml_to_train"
+
+    def tearDown(self):
+        shutil.rmtree(self.extraction_identifier.get_path(), ignore_errors=True)
+
+    def test_missing_xml_raises_an_error(self):
+        xml_file = XmlFile(extraction_identifier=self.extraction_identifier, to_train=True, xml_file_name="test.xml")
+        shutil.copytree(self.resources_path, xml_file.xml_folder_path, dirs_exist_ok=True)
+        paragraph_extraction_data = ParagraphExtractionData(
+            key=self.extraction_identifier.extraction_name,
+            xmls=[
+                XmlData(xml_file_name="test.xml", language="en", is_main_language=True, xml_segments_boxes=[]),
+                XmlData(xml_file_name="missing.xml", language="fr", is_main_language=False, xml_segments_boxes=[]),
+            ],
+        )
+
+        with self.assertRaises(FileNotFoundError):
+            Extractor(self.extraction_identifier, None).get_paragraphs_from_languages(paragraph_extraction_data)
@@ -0,0 +1,65 @@
+import os
+import shutil
+from os.path import join
+from unittest import TestCase
+
+from prometheus_client import REGISTRY
+from trainable_entity_extractor.domain.PdfData import PdfData
+from trainable_entity_extractor.domain.SegmentationData import SegmentationData
+
+from config import APP_PATH, DATA_PATH
+from use_cases.PdfDataCache import PdfDataCache
+
+
+class TestPdfDataCache(TestCase):
+    cache_path = join(DATA_PATH, "cache", "pdf_data_test")
+    test_xml_path = f"{APP_PATH}/tests/resources/tenant_test/extraction_id/xml_to_predict/test.xml"
+    segmentation_data = SegmentationData(page_width=0, page_height=0, xml_segments_boxes=[], label_segments_boxes=[])
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+
+    def test_get_key(self):
+        key = PdfDataCache.get_key(self.test_xml_path, self.segmentation_data, None)
+
+        self.assertEqual(key, PdfDataCache.get_key(self.test_xml_path, self.segmentation_data, None))
+        self.assertNotEqual(key, PdfDataCache.get_key(self.test_xml_path, self.segmentation_data, [1]))
+
+    def test_set_and_get(self):
+        pdf_data_cache = PdfDataCache(self.cache_path, max_size_mb=10)
+
+        self.assertIsNone(pdf_data_cache.get("key"))
+        pdf_data_cache.set("key", PdfData.from_texts(["cached text"]))
+        pdf_data = pdf_data_cache.get("key")
+
+        self.assertEqual("cached text", pdf_data.pdf_data_segments[0].text_content)
+        self.assertEqual(1, pdf_data_cache.hits)
+        self.assertEqual(1, pdf_data_cache.misses)
+        hits_labels = {"cache": PdfDataCache.METRICS_NAME, "result": "hit"}
+        self.assertLessEqual(1, REGISTRY.get_sample_value("pdf_metadata_extraction_cache_lookups_total", hits_labels))
+
+    def test_evict_least_recently_used(self):
+        pdf_data_cache = PdfDataCache(self.cache_path, max_size_mb=10)
+        pdf_data_cache.set("old", PdfData.from_texts(["old"]))
+        pdf_data_cache.set("new", PdfData.from_texts(["new"]))
+        os.utime(pdf_data_cache.get_path("old"), (0, 0))
+        pdf_data_cache.max_size = os.path.getsize(pdf_data_cache.get_path("new"))
+
+        pdf_data_cache.evict()
+
+        self.assertIsNone(pdf_data_cache.get("old"))
+        self.assertIsNotNone(pdf_data_cache.get("new"))
+
+    def test_evict_only_after_writing_a_fraction_of_the_size(self):
+        pdf_data_cache = PdfDataCache(self.cache_path, max_size_mb=10)
+        pdf_data_cache.set("old", PdfData.from_texts(["old"]))
+        pdf_data_cache.max_size = os.path.getsize(pdf_data_cache.get_path("old")) // 2
+
+        PdfDataCache.written_bytes[self.cache_path] = 0
+        pdf_data_cache.evict_if_needed()
+        self.assertTrue(os.path.exists(pdf_data_cache.get_path("old")))
+
+        PdfDataCache.written_bytes[self.cache_path] = pdf_data_cache.max_size
+        pdf_data_cache.evict_if_needed()
+        self.assertFalse(os.path.exists(pdf_data_cache.get_path("old")))
+        self.assertEqual(0, PdfDataCache.written_bytes[self.cache_path])
@@ -0,0 +1,81 @@
+import shutil
+from os.path import join
+from unittest import TestCase
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.PdfData import PdfData
+from trainable_entity_extractor.domain.SegmentBox import SegmentBox
+from trainable_entity_extractor.domain.SegmentationData import SegmentationData
+from trainable_entity_extractor.use_cases.XmlFile import XmlFile
+
+from config import APP_PATH, DATA_PATH
+from use_cases.PdfDataCache import PdfDataCache
+from use_cases.PdfDataParser import PdfDataParser
+
+
+class TestPdfDataParser(TestCase):
+    run_name = "pdf_data_parser_test"
+    cache_path = join(DATA_PATH, "cache", "pdf_data_parser_test")
+    xml_files_names = ["test.xml", "spanish.xml", "blank.xml", "no_pages.xml", "missing.xml"]
+    resources_path = f"{APP_PATH}/tests/resources/tenant_test/extraction_id/xml_to_train"
+
+    def tearDown(self):
+        shutil.rmtree(join(DATA_PATH, self.run_name), ignore_errors=True)
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+
+    def get_xml_files(self) -> list[XmlFile]:
+        extraction_identifier = ExtractionIdentifier(run_name=self.run_name, extraction_name="id", output_path=DATA_PATH)
+        xml_files = [
+            XmlFile(extraction_identifier=extraction_identifier, to_train=True, xml_file_name=x)
+            for x in self.xml_files_names
+        ]
+        shutil.copytree(self.resources_path, xml_files[0].xml_folder_path, dirs_exist_ok=True)
+        return xml_files
+
+    def parse(self, workers: int) -> list[PdfData]:
+        segmentation_data_list = [
+            SegmentationData(page_width=0, page_height=0, xml_segments_boxes=[], label_segments_boxes=[])
+            for _ in self.xml_files_names
+        ]
+        pdf_data_parser = PdfDataParser(workers=workers, pdf_data_cache=PdfDataCache(max_size_mb=0))
+        return pdf_data_parser.parse(self.get_xml_files(), segmentation_data_list, [None] * len(self.xml_files_names))
+
+    @staticmethod
+    def get_segments(pdf_data: PdfData) -> list[tuple]:
+        return [
+            (x.text_content, x.page_number, x.bounding_box.left, x.bounding_box.top, x.bounding_box.width)
+            for x in pdf_data.pdf_data_segments
+        ]
+
+    def test_parallel_parsing_matches_serial_parsing(self):
+        serial_pdf_data_list = self.parse(workers=1)
+        parallel_pdf_data_list = self.parse(workers=2)
+        parallel_pdf_data_list_again = self.parse(workers=2)
+
+        self.assertEqual(len(self.xml_files_names), len(parallel_pdf_data_list))
+        self.assertTrue(self.get_segments(serial_pdf_data_list[0]))
+        self.assertEqual([2], list(PdfDataParser.executors))
+        for serial_pdf_data, parallel_pdf_data, parallel_pdf_data_again in zip(
+            serial_pdf_data_list, parallel_pdf_data_list, parallel_pdf_data_list_again
+        ):
+            self.assertEqual(self.get_segments(serial_pdf_data), self.get_segments(parallel_pdf_data))
+            self.assertEqual(self.get_segments(serial_pdf_data), self.get_segments(parallel_pdf_data_again))
+
+    def test_cache_is_shared_by_different_labels_and_pages(self):
+        label_segment_box = SegmentBox(left=0, top=0, width=612, height=792, page_width=612, page_height=792, page_number=1)
+        labeled_segmentation_data = SegmentationData(
+            page_width=0, page_height=0, xml_segments_boxes=[], label_segments_boxes=[label_segment_box]
+        )
+        segmentation_data = SegmentationData(page_width=0, page_height=0, xml_segments_boxes=[], label_segments_boxes=[])
+        pdf_data_cache = PdfDataCache(self.cache_path, max_size_mb=10)
+
+        labeled_pdf_data = PdfDataParser(1, pdf_data_cache).parse(
+            self.get_xml_files()[:1], [labeled_segmentation_data], [None]
+        )
+        pdf_data = PdfDataParser(1, pdf_data_cache).parse(self.get_xml_files()[:1], [segmentation_data], [[2]])
+
+        self.assertEqual(1, pdf_data_cache.hits)
+        self.assertEqual({1, 2}, {x.page_number for x in labeled_pdf_data[0].pdf_data_segments})
+        self.assertIn(1, {x.ml_label for x in labeled_pdf_data[0].pdf_data_segments})
+        self.assertEqual({2}, {x.page_number for x in pdf_data[0].pdf_data_segments})
+        self.assertEqual({0}, {x.ml_label for x in pdf_data[0].pdf_data_segments})
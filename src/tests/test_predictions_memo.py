@@ -0,0 +1,46 @@
+import shutil
+from unittest import TestCase
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.PredictionData import PredictionData
+from trainable_entity_extractor.domain.SegmentationData import SegmentationData
+
+from config import APP_PATH, DATA_PATH
+from use_cases.PredictionsMemo import PredictionsMemo
+
+
+class TestPredictionsMemo(TestCase):
+    extraction_identifier = ExtractionIdentifier(
+        run_name="predictions_memo_test", extraction_name="extraction_id", output_path=DATA_PATH
+    )
+    test_xml_path = f"{APP_PATH}/tests/resources/tenant_test/extraction_id/xml_to_predict/test.xml"
+    segmentation_data = SegmentationData(page_width=0, page_height=0, xml_segments_boxes=[], label_segments_boxes=[])
+
+    def tearDown(self):
+        shutil.rmtree(self.extraction_identifier.get_path(), ignore_errors=True)
+
+    def get_prediction_data(self, xml_file_name: str) -> PredictionData:
+        return PredictionData(
+            tenant=self.extraction_identifier.run_name,
+            id=self.extraction_identifier.extraction_name,
+            xml_file_name=xml_file_name,
+            page_width=612,
+            page_height=792,
+            xml_segments_boxes=[],
+        )
+
+    def get_key(self, predictions_memo: PredictionsMemo, xml_file_name: str = "test.xml") -> str:
+        return predictions_memo.get_prediction_key(
+            self.test_xml_path, self.segmentation_data, None, self.get_prediction_data(xml_file_name)
+        )
+
+    def test_get_prediction_key(self):
+        predictions_memo = PredictionsMemo(self.extraction_identifier)
+        key = self.get_key(predictions_memo)
+
+        self.assertEqual(key, self.get_key(PredictionsMemo(self.extraction_identifier)))
+        self.assertNotEqual(key, self.get_key(predictions_memo, "other.xml"))
+
+        predictions_memo.delete()
+
+        self.assertNotEqual(key, self.get_key(PredictionsMemo(self.extraction_identifier)))
@@ -0,0 +1,35 @@
+import os
+import shutil
+from os.path import join
+from time import perf_counter
+from unittest import TestCase
+
+from config import DATA_PATH
+from use_cases.SamplingProfiler import SamplingProfiler
+
+
+def busy_function():
+    start = perf_counter()
+    while perf_counter() - start < 0.2:
+        pass
+
+
+class TestSamplingProfiler(TestCase):
+    profile_folder = join(DATA_PATH, "sampling_profiler_test")
+
+    def tearDown(self):
+        shutil.rmtree(self.profile_folder, ignore_errors=True)
+
+    def test_write_folded_stacks(self):
+        profile_path = join(self.profile_folder, "profiles", "task.folded")
+
+        with SamplingProfiler(profile_path, interval_seconds=0.005):
+            busy_function()
+
+        self.assertTrue(os.path.exists(profile_path))
+        with open(profile_path) as file:
+            lines = file.read().splitlines()
+
+        self.assertTrue(lines)
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertTrue(any("test_write_folded_stacks" in line and "busy_function" in line for line in lines))
@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import mongomock
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.PredictionData import PredictionData
+from trainable_entity_extractor.domain.Suggestion import Suggestion
+
+from adapters.MongoPersistenceRepository import MongoPersistenceRepository
+from config import DATA_PATH
+from use_cases.Extractor import Extractor
+
+
+class TestSaveSuggestionsInChunks(TestCase):
+    extraction_identifier = ExtractionIdentifier(
+        run_name="suggestions_chunks_test", extraction_name="extraction_id", output_path=DATA_PATH
+    )
+
+    def get_suggestions(self, prediction_data_list: list[PredictionData]) -> list[Suggestion]:
+        if any(x.xml_file_name == "file_2.xml" for x in prediction_data_list):
+            raise RuntimeError("Prediction failed")
+
+        return [
+            Suggestion(
+                tenant=self.extraction_identifier.run_name,
+                id=self.extraction_identifier.extraction_name,
+                xml_file_name=x.xml_file_name,
+                text="text",
+                segment_text="segment_text",
+                page_number=1,
+                segments_boxes=[],
+            )
+            for x in prediction_data_list
+        ]
+
+    def save_prediction_data(self, persistence_repository: MongoPersistenceRepository, amount: int):
+        prediction_data_list = [
+            PredictionData(
+                tenant=self.extraction_identifier.run_name,
+                id=self.extraction_identifier.extraction_name,
+                xml_file_name=f"file_{i}.xml",
+                page_width=612,
+                page_height=792,
+                xml_segments_boxes=[],
+            )
+            for i in range(amount)
+        ]
+        persistence_repository.save_prediction_data_list(self.extraction_identifier, prediction_data_list)
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    @patch("use_cases.Extractor.send_logs")
+    @patch("use_cases.Extractor.TrainableEntityExtractor")
+    def test_failed_chunk_removes_the_suggestions_of_the_run(self, _, __):
+        persistence_repository = MongoPersistenceRepository()
+        self.save_prediction_data(persistence_repository, 3)
+        extractor = Extractor(self.extraction_identifier, persistence_repository)
+
+        with patch.object(Extractor, "predict", side_effect=lambda _, x, __: self.get_suggestions(x)):
+            with self.assertRaises(RuntimeError):
+                extractor.save_suggestions_in_chunks(chunk_size=2)
+
+        self.assertEqual(0, persistence_repository.mongo_db.suggestions.count_documents({}))
+
+    @mongomock.patch(servers=["mongodb://127.0.0.1:29017"])
+    @patch("use_cases.Extractor.send_logs")
+    @patch("use_cases.Extractor.TrainableEntityExtractor")
+    def test_suggestions_are_published_when_all_chunks_are_saved(self, _, __):
+        persistence_repository = MongoPersistenceRepository()
+        self.save_prediction_data(persistence_repository, 2)
+        extractor = Extractor(self.extraction_identifier, persistence_repository)
+
+        with patch.object(Extractor, "predict", side_effect=lambda _, x, __: self.get_suggestions(x)):
+            self.assertEqual((True, ""), extractor.save_suggestions_in_chunks(chunk_size=1))
+
+        suggestions = persistence_repository.load_suggestions(self.extraction_identifier)
+        self.assertEqual(["file_0.xml", "file_1.xml"], sorted([x.xml_file_name for x in suggestions]))
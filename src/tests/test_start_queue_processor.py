@@ -0,0 +1,54 @@
+import os
+import signal
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from drivers.queues_processor.start_queue_processor import get_coalesced_result, start_worker
+
+
+@patch("drivers.queues_processor.start_queue_processor.start_metrics_server")
+@patch("drivers.queues_processor.start_queue_processor.ModelsJanitor")
+@patch("drivers.queues_processor.start_queue_processor.ConcurrentQueueProcessor")
+class TestStartQueueProcessor(TestCase):
+    def setUp(self):
+        self.sigterm_handler = signal.getsignal(signal.SIGTERM)
+
+    def tearDown(self):
+        signal.signal(signal.SIGTERM, self.sigterm_handler)
+
+    def test_start_worker_closes_the_persistence_repository(self, concurrent_queue_processor, *_):
+        persistence_repository = MagicMock()
+
+        start_worker(persistence_repository)
+
+        concurrent_queue_processor.return_value.start.assert_called_once()
+        persistence_repository.close.assert_called_once()
+
+    def test_sigterm_stops_the_worker_and_closes_the_persistence_repository(self, concurrent_queue_processor, *_):
+        persistence_repository = MagicMock()
+        concurrent_queue_processor.return_value.start.side_effect = lambda *_: os.kill(os.getpid(), signal.SIGTERM)
+
+        with self.assertRaises(SystemExit) as context:
+            start_worker(persistence_repository)
+
+        self.assertEqual(0, context.exception.code)
+        persistence_repository.close.assert_called_once()
+
+    def test_get_coalesced_result_keeps_the_task_params(self, *_):
+        result = {
+            "tenant": "tenant",
+            "task": "create_model",
+            "params": {"id": "id", "options": [], "multi_value": True, "incremental": False, "metadata": {"a": "2"}},
+            "success": True,
+            "error_message": "",
+        }
+        message = {"tenant": "tenant", "task": "create_model", "params": {"id": "id", "metadata": {"a": "1"}}}
+
+        coalesced_result = get_coalesced_result(result, message)
+
+        expected_params = {"id": "id", "options": [], "multi_value": False, "incremental": False, "metadata": {"a": "1"}}
+        self.assertEqual(expected_params, coalesced_result["params"])
+        self.assertEqual(
+            {"id": "id", "options": [], "multi_value": True, "incremental": False, "metadata": {"a": "2"}}, result["params"]
+        )
+        self.assertTrue(coalesced_result["success"])
@@ -0,0 +1,138 @@
+import inspect
+import os
+import shutil
+import threading
+from os.path import join
+from unittest import TestCase
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+
+from config import DATA_PATH
+from use_cases.TrainableEntityExtractorsCache import TrainableEntityExtractorsCache
+
+
+class FakeModel:
+    loads = 0
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def from_pretrained(cls, path: str, **kwargs):
+        cls.loads += 1
+        return cls(path)
+
+
+class TestTrainableEntityExtractorsCache(TestCase):
+    run_name = "trainable_entity_extractors_cache_test"
+    extraction_identifier = ExtractionIdentifier(run_name=run_name, extraction_name="id", output_path=DATA_PATH)
+
+    def setUp(self):
+        FakeModel.loads = 0
+        os.makedirs(self.get_model_path(), exist_ok=True)
+        with open(join(self.get_model_path(), "model.bin"), "wb") as file:
+            file.write(b"0" * 1024)
+
+    def tearDown(self):
+        shutil.rmtree(join(DATA_PATH, self.run_name), ignore_errors=True)
+
+    def get_model_path(self) -> str:
+        return join(self.extraction_identifier.get_path(), "model")
+
+    @staticmethod
+    def get_cache(memory_budget_mb: int = 1, patch_loaders: bool = True) -> TrainableEntityExtractorsCache:
+        trainable_entity_extractors_cache = TrainableEntityExtractorsCache(memory_budget_mb, patch_loaders)
+        trainable_entity_extractors_cache.LOADERS = [(__name__, "FakeModel", "from_pretrained")]
+        return trainable_entity_extractors_cache
+
+    def test_loaded_models_are_reused_inside_the_extraction_scope(self):
+        trainable_entity_extractors_cache = self.get_cache()
+
+        with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            model = FakeModel.from_pretrained(self.get_model_path())
+            self.assertIs(model, FakeModel.from_pretrained(self.get_model_path()))
+        FakeModel.from_pretrained(self.get_model_path())
+
+        self.assertEqual(2, FakeModel.loads)
+        self.assertEqual(1, trainable_entity_extractors_cache.hits)
+        self.assertEqual(1024, trainable_entity_extractors_cache.get_size())
+
+    def test_evict_least_recently_used(self):
+        trainable_entity_extractors_cache = self.get_cache()
+        megabyte = 1024 * 1024
+        trainable_entity_extractors_cache.set(("loader", "old", ""), "old", megabyte // 2, 0)
+        trainable_entity_extractors_cache.set(("loader", "used", ""), "used", megabyte // 4, 0)
+        trainable_entity_extractors_cache.get(("loader", "old", ""), 0)
+        trainable_entity_extractors_cache.set(("loader", "new", ""), "new", megabyte // 2, 0)
+
+        self.assertIsNone(trainable_entity_extractors_cache.get(("loader", "used", ""), 0))
+        self.assertEqual("old", trainable_entity_extractors_cache.get(("loader", "old", ""), 0))
+        self.assertEqual("new", trainable_entity_extractors_cache.get(("loader", "new", ""), 0))
+
+    def test_skip_models_over_budget(self):
+        trainable_entity_extractors_cache = self.get_cache(memory_budget_mb=0)
+
+        with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            FakeModel.from_pretrained(self.get_model_path())
+            FakeModel.from_pretrained(self.get_model_path())
+
+        self.assertEqual(2, FakeModel.loads)
+        self.assertEqual(0, len(trainable_entity_extractors_cache.models))
+
+    def test_invalidate_when_the_model_files_change(self):
+        trainable_entity_extractors_cache = self.get_cache()
+
+        with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            model = FakeModel.from_pretrained(self.get_model_path())
+            model_file_path = join(self.get_model_path(), "model.bin")
+            os.utime(model_file_path, (os.path.getmtime(model_file_path) + 10, os.path.getmtime(model_file_path) + 10))
+            retrained_model = FakeModel.from_pretrained(self.get_model_path())
+
+            trainable_entity_extractors_cache.invalidate(self.extraction_identifier)
+            FakeModel.from_pretrained(self.get_model_path())
+
+        self.assertIsNot(model, retrained_model)
+        self.assertEqual(3, FakeModel.loads)
+
+    def test_original_loaders_are_restored(self):
+        original_loader = inspect.getattr_static(FakeModel, "from_pretrained")
+        trainable_entity_extractors_cache = self.get_cache()
+
+        with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+                self.assertIsNot(original_loader, inspect.getattr_static(FakeModel, "from_pretrained"))
+            self.assertIsNot(original_loader, inspect.getattr_static(FakeModel, "from_pretrained"))
+
+        self.assertIs(original_loader, inspect.getattr_static(FakeModel, "from_pretrained"))
+
+    def test_loaders_are_not_patched_when_disabled(self):
+        original_loader = inspect.getattr_static(FakeModel, "from_pretrained")
+        trainable_entity_extractors_cache = self.get_cache(patch_loaders=False)
+
+        with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            self.assertIs(original_loader, inspect.getattr_static(FakeModel, "from_pretrained"))
+            FakeModel.from_pretrained(self.get_model_path())
+            FakeModel.from_pretrained(self.get_model_path())
+
+        self.assertEqual(2, FakeModel.loads)
+
+    def test_models_in_use_are_not_shared_between_threads(self):
+        trainable_entity_extractors_cache = self.get_cache()
+        models = list()
+
+        def load_in_other_thread():
+            with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+                models.append(FakeModel.from_pretrained(self.get_model_path()))
+
+        with trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            models.append(FakeModel.from_pretrained(self.get_model_path()))
+            thread = threading.Thread(target=load_in_other_thread)
+            thread.start()
+            thread.join()
+
+        thread = threading.Thread(target=load_in_other_thread)
+        thread.start()
+        thread.join()
+
+        self.assertIsNot(models[0], models[1])
+        self.assertIs(models[0], models[2])
@@ -0,0 +1,98 @@
+import shutil
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.LabeledData import LabeledData
+from trainable_entity_extractor.domain.PdfData import PdfData
+from trainable_entity_extractor.domain.SegmentBox import SegmentBox
+from trainable_entity_extractor.domain.TrainingSample import TrainingSample
+
+from config import DATA_PATH
+from use_cases.Extractor import Extractor
+from use_cases.TrainingSamplesSnapshot import TrainingSamplesSnapshot
+
+
+class TestTrainingSamplesSnapshot(TestCase):
+    extraction_identifier = ExtractionIdentifier(
+        run_name="training_samples_test", extraction_name="extraction_id", output_path=DATA_PATH
+    )
+
+    def tearDown(self):
+        shutil.rmtree(self.extraction_identifier.get_path(), ignore_errors=True)
+
+    def get_training_sample(self, xml_file_name: str, label_text: str) -> TrainingSample:
+        labeled_data = LabeledData(
+            tenant=self.extraction_identifier.run_name,
+            id=self.extraction_identifier.extraction_name,
+            xml_file_name=xml_file_name,
+            language_iso="en",
+            label_text=label_text,
+            page_width=612,
+            page_height=792,
+            xml_segments_boxes=[],
+            label_segments_boxes=[],
+        )
+        return TrainingSample(
+            pdf_data=PdfData.from_texts([label_text]), labeled_data=labeled_data, segment_selector_texts=[label_text]
+        )
+
+    def test_save_and_merge(self):
+        training_samples_snapshot = TrainingSamplesSnapshot(self.extraction_identifier)
+        training_samples_snapshot.save([self.get_training_sample("1.xml", "one"), self.get_training_sample("2.xml", "two")])
+
+        previous_training_samples = training_samples_snapshot.load()
+        new_training_samples = [self.get_training_sample("2.xml", "new two"), self.get_training_sample("3.xml", "three")]
+        training_samples = Extractor.merge_training_samples(previous_training_samples, new_training_samples)
+
+        self.assertEqual(2, len(previous_training_samples))
+        self.assertEqual(["one", "new two", "three"], [x.labeled_data.label_text for x in training_samples])
+        training_samples_snapshot.save(new_training_samples)
+        training_samples_snapshot.save(previous_training_samples, overwrite=False)
+
+        saved_training_samples = training_samples_snapshot.load()
+        self.assertEqual({"one", "new two", "three"}, {x.labeled_data.label_text for x in saved_training_samples})
+
+    @patch("use_cases.Extractor.send_logs")
+    @patch("use_cases.Extractor.FilterValidSegmentsPages")
+    def test_snapshot_pdf_data_gets_the_new_labels_and_pages(self, filter_valid_segments_pages, _):
+        filter_valid_segments_pages.return_value.for_training.side_effect = lambda x: [None, [2], None]
+        previous_training_samples = [self.get_training_sample("1.xml", "one"), self.get_training_sample("2.xml", "two")]
+        label_segment_box = SegmentBox(left=0, top=0, width=10, height=10, page_width=612, page_height=792, page_number=1)
+        new_labeled_data = self.get_training_sample("2.xml", "new two").labeled_data
+        new_labeled_data.label_segments_boxes = [label_segment_box]
+        labeled_data_list = [new_labeled_data, self.get_training_sample("3.xml", "three").labeled_data]
+        extractor = Extractor(self.extraction_identifier, None, incremental=True)
+
+        snapshot_samples = extractor.get_snapshot_samples(labeled_data_list, previous_training_samples)
+        with patch.object(PdfData, "set_ml_label_from_segmentation_data", autospec=True) as set_ml_label:
+            training_samples = extractor.get_training_samples(
+                Extractor.merge_training_samples(previous_training_samples, snapshot_samples)
+            )
+
+        filtered_labeled_data_list = filter_valid_segments_pages.return_value.for_training.call_args[0][0]
+        self.assertEqual(["one", "new two", "three"], [x.label_text for x in filtered_labeled_data_list])
+        self.assertEqual(["one", "new two", "three"], [x.labeled_data.label_text for x in training_samples])
+        self.assertIs(previous_training_samples[1].pdf_data, snapshot_samples[0].pdf_data)
+        self.assertIsNot(snapshot_samples[0].pdf_data, training_samples[1].pdf_data)
+        self.assertEqual([], training_samples[1].pdf_data.pdf_data_segments)
+        self.assertEqual(1, len(snapshot_samples[0].pdf_data.pdf_data_segments))
+        self.assertIs(training_samples[1].pdf_data, set_ml_label.call_args_list[1][0][0])
+        self.assertEqual([label_segment_box], set_ml_label.call_args_list[1][0][1].label_segments_boxes)
+        self.assertEqual("", training_samples[2].pdf_data.pdf_data_segments[0].text_content)
+
+    @patch("use_cases.Extractor.send_logs")
+    def test_create_models_fails_when_the_segments_change_without_xml(self, _):
+        previous_training_samples = [self.get_training_sample("1.xml", "one")]
+        TrainingSamplesSnapshot(self.extraction_identifier).save(previous_training_samples)
+        labeled_data = self.get_training_sample("1.xml", "one").labeled_data
+        labeled_data.page_width = 1000
+        persistence_repository = MagicMock()
+        persistence_repository.load_labeled_data.return_value = [labeled_data]
+
+        model_created, error_message = Extractor(
+            self.extraction_identifier, persistence_repository, incremental=True
+        ).create_models()
+
+        self.assertFalse(model_created)
+        self.assertIn("1.xml", error_message)
@@ -1,7 +1,9 @@
-import os
 import shutil
-from os.path import join, exists
+import uuid
+from datetime import datetime
+from os.path import exists, isdir, join
 from time import time
+from typing import Optional
 
 from multilingual_paragraph_extractor.domain.ParagraphFeatures import ParagraphFeatures
 from multilingual_paragraph_extractor.domain.ParagraphsFromLanguage import ParagraphsFromLanguage
@@ -24,15 +26,30 @@ from trainable_entity_extractor.use_cases.TrainableEntityExtractor import Traina
 from trainable_entity_extractor.use_cases.XmlFile import XmlFile
 from trainable_entity_extractor.use_cases.send_logs import send_logs
 
-from config import DATA_PATH, PARAGRAPH_EXTRACTION_NAME
+from config import DATA_PATH, PARAGRAPH_EXTRACTION_NAME, PREDICTION_CHUNK_SIZE, PROFILE_TASKS
 from domain.ParagraphExtractorTask import ParagraphExtractorTask
 from domain.TrainableEntityExtractionTask import TrainableEntityExtractionTask
 from ports.PersistenceRepository import PersistenceRepository
+from use_cases.ModelsJanitor import ModelsJanitor
+from use_cases.PdfDataParser import PdfDataParser
+from use_cases.PredictionsMemo import PredictionsMemo
+from use_cases.SamplingProfiler import SamplingProfiler
+from use_cases.TrainableEntityExtractorsCache import TrainableEntityExtractorsCache
+from use_cases.TrainingSamplesSnapshot import TrainingSamplesSnapshot
+from use_cases.metrics import (
+    measure_stage,
+    measure_iterator,
+    get_files_size,
+    PARSED_BYTES,
+    DOCUMENTS_PROCESSED,
+    SUGGESTIONS_SAVED,
+)
 
 
 class Extractor:
     CREATE_MODEL_TASK_NAME = "create_model"
     SUGGESTIONS_TASK_NAME = "suggestions"
+    trainable_entity_extractors_cache = TrainableEntityExtractorsCache()
 
     def __init__(
         self,
@@ -40,76 +57,269 @@ class Extractor:
         persistence_repository: PersistenceRepository,
         options: list[Option] = None,
         multi_value: bool = False,
+        incremental: bool = False,
     ):
         self.extraction_identifier = extraction_identifier
         self.persistence_repository = persistence_repository
         self.multi_value = multi_value
         self.options = options
+        self.incremental = incremental
+
+    @staticmethod
+    def is_xml_uploaded(xml_file: XmlFile) -> bool:
+        return exists(xml_file.xml_file_path) and not isdir(xml_file.xml_file_path)
 
-    def get_extraction_data_for_training(self, labeled_data_list: list[LabeledData]) -> ExtractionData:
-        multi_option_samples: list[TrainingSample] = list()
-        page_numbers_list = FilterValidSegmentsPages(self.extraction_identifier).for_training(labeled_data_list)
-        for labeled_data, page_numbers_to_keep in zip(labeled_data_list, page_numbers_list):
-            segmentation_data = SegmentationData.from_labeled_data(labeled_data)
-            xml_file = XmlFile(
-                extraction_identifier=self.extraction_identifier,
-                to_train=True,
-                xml_file_name=labeled_data.xml_file_name,
+    @staticmethod
+    def has_same_segments(labeled_data: LabeledData, other_labeled_data: LabeledData) -> bool:
+        segments = (labeled_data.page_width, labeled_data.page_height, labeled_data.xml_segments_boxes)
+        return segments == (
+            other_labeled_data.page_width,
+            other_labeled_data.page_height,
+            other_labeled_data.xml_segments_boxes,
+        )
+
+    def get_changed_segments_xml_files_names(
+        self, labeled_data_list: list[LabeledData], previous_training_samples: list[TrainingSample]
+    ) -> list[str]:
+        previous_labeled_data = {x.labeled_data.xml_file_name: x.labeled_data for x in previous_training_samples}
+        return [
+            labeled_data.xml_file_name
+            for labeled_data in labeled_data_list
+            if labeled_data.xml_file_name in previous_labeled_data
+            and not self.is_xml_uploaded(self.get_training_xml_file(labeled_data))
+            and not self.has_same_segments(labeled_data, previous_labeled_data[labeled_data.xml_file_name])
+        ]
+
+    def get_training_xml_file(self, labeled_data: LabeledData) -> XmlFile:
+        return XmlFile(
+            extraction_identifier=self.extraction_identifier, to_train=True, xml_file_name=labeled_data.xml_file_name
+        )
+
+    def get_snapshot_samples(
+        self, labeled_data_list: list[LabeledData], previous_training_samples: list[TrainingSample] = None
+    ) -> list[TrainingSample]:
+        previous_pdf_data = {x.labeled_data.xml_file_name: x.pdf_data for x in previous_training_samples or list()}
+        xml_files = [self.get_training_xml_file(x) for x in labeled_data_list]
+        indexes_to_parse = [
+            index
+            for index, xml_file in enumerate(xml_files)
+            if xml_file.xml_file_name not in previous_pdf_data or self.is_xml_uploaded(xml_file)
+        ]
+        parsed_pdf_data_list = self.parse_unlabeled_pdf_data(
+            [xml_files[index] for index in indexes_to_parse],
+            [SegmentationData.from_labeled_data(labeled_data_list[index]) for index in indexes_to_parse],
+            self.CREATE_MODEL_TASK_NAME,
+        )
+
+        pdf_data_list = [previous_pdf_data.get(x.xml_file_name) for x in labeled_data_list]
+        for index, pdf_data in zip(indexes_to_parse, parsed_pdf_data_list):
+            pdf_data_list[index] = pdf_data
+
+        if len(indexes_to_parse) < len(labeled_data_list):
+            send_logs(
+                self.extraction_identifier,
+                f"{len(labeled_data_list) - len(indexes_to_parse)} labels without an uploaded XML "
+                f"use the parsed document from the snapshot",
             )
 
-            if exists(xml_file.xml_file_path) and not os.path.isdir(xml_file.xml_file_path):
-                pdf_data = PdfData.from_xml_file(xml_file, segmentation_data, page_numbers_to_keep)
-            else:
-                pdf_data = PdfData.from_texts([""])
+        return [
+            TrainingSample(pdf_data=pdf_data, labeled_data=labeled_data, segment_selector_texts=[labeled_data.source_text])
+            for labeled_data, pdf_data in zip(labeled_data_list, pdf_data_list)
+        ]
+
+    def get_training_samples(self, snapshot_samples: list[TrainingSample]) -> list[TrainingSample]:
+        labeled_data_list = [x.labeled_data for x in snapshot_samples]
+        with measure_stage(self.CREATE_MODEL_TASK_NAME, "filter_pages"):
+            page_numbers_list = FilterValidSegmentsPages(self.extraction_identifier).for_training(labeled_data_list)
+
+        training_samples: list[TrainingSample] = list()
+        for snapshot_sample, page_numbers in zip(snapshot_samples, page_numbers_list):
+            segmentation_data = SegmentationData.from_labeled_data(snapshot_sample.labeled_data)
             sample = TrainingSample(
-                pdf_data=pdf_data, labeled_data=labeled_data, segment_selector_texts=[labeled_data.source_text]
+                pdf_data=PdfDataParser.get_labeled_pdf_data(snapshot_sample.pdf_data, segmentation_data, page_numbers),
+                labeled_data=snapshot_sample.labeled_data,
+                segment_selector_texts=snapshot_sample.segment_selector_texts,
             )
-            multi_option_samples.append(sample)
-            xml_file.delete()
+            training_samples.append(sample)
+
+        return training_samples
 
+    def get_extraction_data_for_training(self, training_samples: list[TrainingSample]) -> ExtractionData:
         return ExtractionData(
-            samples=multi_option_samples,
+            samples=training_samples,
             options=self.options,
             multi_value=self.multi_value,
             extraction_identifier=self.extraction_identifier,
         )
 
+    @staticmethod
+    def merge_training_samples(
+        previous_training_samples: list[TrainingSample], training_samples: list[TrainingSample]
+    ) -> list[TrainingSample]:
+        new_xml_files_names = {x.labeled_data.xml_file_name for x in training_samples}
+        unchanged_training_samples = [
+            x for x in previous_training_samples if x.labeled_data.xml_file_name not in new_xml_files_names
+        ]
+        return unchanged_training_samples + training_samples
+
+    def log_parsed_pdf_data(self, pdf_data_parser: PdfDataParser, parsed_count: int):
+        pdf_data_cache = pdf_data_parser.pdf_data_cache
+        config_logger.info(
+            f"Parsed {parsed_count} XMLs for {self.extraction_identifier.run_name}/"
+            f"{self.extraction_identifier.extraction_name}. "
+            f"PDF data cache hits: {pdf_data_cache.hits}, misses: {pdf_data_cache.misses}"
+        )
+
+    def parse_pdf_data(
+        self,
+        xml_files: list[XmlFile],
+        segmentation_data_list: list[SegmentationData],
+        page_numbers_list: list[Optional[list[int]]],
+        task: str,
+    ) -> list[PdfData]:
+        pdf_data_parser = PdfDataParser()
+        PARSED_BYTES.labels(task).inc(get_files_size([x.xml_file_path for x in xml_files]))
+        with measure_stage(task, "parse"):
+            pdf_data_list = pdf_data_parser.parse(xml_files, segmentation_data_list, page_numbers_list)
+        self.log_parsed_pdf_data(pdf_data_parser, len(pdf_data_list))
+        return pdf_data_list
+
+    def parse_unlabeled_pdf_data(
+        self, xml_files: list[XmlFile], segmentation_data_list: list[SegmentationData], task: str
+    ) -> list[PdfData]:
+        pdf_data_parser = PdfDataParser()
+        PARSED_BYTES.labels(task).inc(get_files_size([x.xml_file_path for x in xml_files]))
+        with measure_stage(task, "parse"):
+            pdf_data_list = pdf_data_parser.parse_unlabeled(xml_files, segmentation_data_list)
+        self.log_parsed_pdf_data(pdf_data_parser, len(pdf_data_list))
+        return pdf_data_list
+
     def create_models(self) -> (bool, str):
         start = time()
         send_logs(self.extraction_identifier, "Loading data to create model")
-        labeled_data_list = self.persistence_repository.load_labeled_data(self.extraction_identifier)
-        extraction_data: ExtractionData = self.get_extraction_data_for_training(labeled_data_list)
-        send_logs(self.extraction_identifier, f"Set data in {round(time() - start, 2)} seconds")
+        with measure_stage(self.CREATE_MODEL_TASK_NAME, "load"):
+            labeled_data_list = self.persistence_repository.load_labeled_data(self.extraction_identifier)
+        training_samples_snapshot = TrainingSamplesSnapshot(self.extraction_identifier)
+        with measure_stage(self.CREATE_MODEL_TASK_NAME, "load_snapshot"):
+            previous_training_samples = training_samples_snapshot.load() if self.incremental else list()
+        changed_xml_files_names = self.get_changed_segments_xml_files_names(labeled_data_list, previous_training_samples)
+        if changed_xml_files_names:
+            error_message = f"Labels changed the segments of {', '.join(changed_xml_files_names)}. Upload their XMLs again"
+            send_logs(self.extraction_identifier, error_message)
+            return False, error_message
+
+        snapshot_samples = self.get_snapshot_samples(labeled_data_list, previous_training_samples)
+        all_snapshot_samples = self.merge_training_samples(previous_training_samples, snapshot_samples)
+        training_samples = self.get_training_samples(all_snapshot_samples)
+        extraction_data: ExtractionData = self.get_extraction_data_for_training(training_samples)
+        send_logs(
+            self.extraction_identifier,
+            f"Set data in {round(time() - start, 2)} seconds. "
+            f"{len(snapshot_samples)} new samples, {len(training_samples) - len(snapshot_samples)} from snapshot",
+        )
+        DOCUMENTS_PROCESSED.labels(self.CREATE_MODEL_TASK_NAME).inc(len(snapshot_samples))
         self.delete_training_data()
         trainable_entity_extractor = TrainableEntityExtractor(self.extraction_identifier)
-        return trainable_entity_extractor.train(extraction_data)
+        try:
+            with measure_stage(self.CREATE_MODEL_TASK_NAME, "train"):
+                model_created, error_message = trainable_entity_extractor.train(extraction_data)
+        finally:
+            self.trainable_entity_extractors_cache.invalidate(self.extraction_identifier)
+            PredictionsMemo(self.extraction_identifier).delete()
+
+        if model_created:
+            with measure_stage(self.CREATE_MODEL_TASK_NAME, "save_snapshot"):
+                if not self.incremental:
+                    training_samples_snapshot.delete()
+                training_samples_snapshot.save(snapshot_samples)
+
+        return model_created, error_message
+
+    def get_prediction_samples(
+        self,
+        prediction_data_list: list[PredictionData],
+        xml_files: list[XmlFile],
+        segmentation_data_list: list[SegmentationData],
+        page_numbers_list: list[Optional[list[int]]],
+    ) -> list[PredictionSample]:
+        pdf_data_list = self.parse_pdf_data(xml_files, segmentation_data_list, page_numbers_list, self.SUGGESTIONS_TASK_NAME)
 
-    def get_prediction_samples(self, prediction_data_list: list[PredictionData] = None) -> list[PredictionSample]:
-        filter_valid_pages = FilterValidSegmentsPages(self.extraction_identifier)
-        page_numbers_list = filter_valid_pages.for_prediction(prediction_data_list)
         prediction_samples: list[PredictionSample] = []
-        for prediction_data, page_numbers in zip(prediction_data_list, page_numbers_list):
-            segmentation_data = SegmentationData.from_prediction_data(prediction_data)
+        for prediction_data, pdf_data in zip(prediction_data_list, pdf_data_list):
             entity_name = prediction_data.entity_name if prediction_data.entity_name else prediction_data.xml_file_name
-
-            xml_file = XmlFile(
-                extraction_identifier=self.extraction_identifier,
-                to_train=False,
-                xml_file_name=prediction_data.xml_file_name,
-            )
-
-            if exists(xml_file.xml_file_path) and not os.path.isdir(xml_file.xml_file_path):
-                pdf_data = PdfData.from_xml_file(xml_file, segmentation_data, page_numbers)
-            else:
-                pdf_data = PdfData.from_texts([""])
-
-            xml_file.delete()
-
             sample = PredictionSample(pdf_data=pdf_data, entity_name=entity_name, source_text=prediction_data.source_text)
             prediction_samples.append(sample)
 
         return prediction_samples
 
+    def get_prediction_inputs(
+        self, prediction_data_list: list[PredictionData]
+    ) -> (list[XmlFile], list[SegmentationData], list[Optional[list[int]]]):
+        with measure_stage(self.SUGGESTIONS_TASK_NAME, "filter_pages"):
+            page_numbers_list = FilterValidSegmentsPages(self.extraction_identifier).for_prediction(prediction_data_list)
+        segmentation_data_list = [SegmentationData.from_prediction_data(x) for x in prediction_data_list]
+        xml_files = [
+            XmlFile(extraction_identifier=self.extraction_identifier, to_train=False, xml_file_name=x.xml_file_name)
+            for x in prediction_data_list
+        ]
+        return xml_files, segmentation_data_list, page_numbers_list
+
+    def predict(
+        self,
+        trainable_entity_extractor: TrainableEntityExtractor,
+        prediction_data_list: list[PredictionData],
+        predictions_memo: PredictionsMemo,
+    ) -> list[Suggestion]:
+        DOCUMENTS_PROCESSED.labels(self.SUGGESTIONS_TASK_NAME).inc(len(prediction_data_list))
+        xml_files, segmentation_data_list, page_numbers_list = self.get_prediction_inputs(prediction_data_list)
+        keys: list[Optional[str]] = list()
+        suggestions: list[Optional[Suggestion]] = list()
+        for xml_file, segmentation_data, page_numbers, prediction_data in zip(
+            xml_files, segmentation_data_list, page_numbers_list, prediction_data_list
+        ):
+            key = None
+            if predictions_memo.is_enabled() and exists(xml_file.xml_file_path) and not isdir(xml_file.xml_file_path):
+                key = predictions_memo.get_prediction_key(
+                    xml_file.xml_file_path, segmentation_data, page_numbers, prediction_data
+                )
+            keys.append(key)
+            suggestions.append(predictions_memo.get(key) if key else None)
+
+        indexes_to_predict = [index for index, suggestion in enumerate(suggestions) if suggestion is None]
+        for index in set(range(len(suggestions))) - set(indexes_to_predict):
+            xml_files[index].delete()
+
+        if indexes_to_predict:
+            prediction_samples = self.get_prediction_samples(
+                [prediction_data_list[index] for index in indexes_to_predict],
+                [xml_files[index] for index in indexes_to_predict],
+                [segmentation_data_list[index] for index in indexes_to_predict],
+                [page_numbers_list[index] for index in indexes_to_predict],
+            )
+            with measure_stage(self.SUGGESTIONS_TASK_NAME, "predict"):
+                predicted_suggestions = trainable_entity_extractor.predict(prediction_samples)
+            if len(predicted_suggestions) != len(prediction_samples):
+                return [x for x in suggestions if x] + predicted_suggestions
+
+            for index, suggestion in zip(indexes_to_predict, predicted_suggestions):
+                suggestions[index] = suggestion
+                if keys[index]:
+                    predictions_memo.set(keys[index], suggestion)
+
+        return suggestions
+
+    def log_predictions_memo(self, predictions_memo: PredictionsMemo):
+        if not predictions_memo.is_enabled():
+            return
+
+        predictions_memo.evict_if_needed()
+        lookups = predictions_memo.hits + predictions_memo.misses
+        hit_rate = round(100 * predictions_memo.hits / lookups, 1) if lookups else 0
+        send_logs(
+            self.extraction_identifier,
+            f"Predictions memo hits: {predictions_memo.hits}, misses: {predictions_memo.misses}, hit rate: {hit_rate}%",
+        )
+
     def delete_training_data(self):
         training_xml_path = XmlFile(extraction_identifier=self.extraction_identifier, to_train=True).xml_folder_path
         send_logs(self.extraction_identifier, f"Deleting training data in {training_xml_path}")
@@ -120,100 +330,175 @@ class Extractor:
         if not suggestions:
             return False, "No data to calculate suggestions"
 
-        self.persistence_repository.save_suggestions(self.extraction_identifier, suggestions)
+        with measure_stage(self.SUGGESTIONS_TASK_NAME, "save"):
+            self.persistence_repository.save_suggestions(self.extraction_identifier, suggestions)
+        SUGGESTIONS_SAVED.inc(len(suggestions))
         return True, ""
 
     def get_suggestions(self) -> list[Suggestion]:
-        prediction_data_list = self.persistence_repository.load_prediction_data(self.extraction_identifier)
-        prediction_samples = self.get_prediction_samples(prediction_data_list)
+        with measure_stage(self.SUGGESTIONS_TASK_NAME, "load"):
+            prediction_data_list = self.persistence_repository.load_prediction_data(self.extraction_identifier)
         trainable_entity_extractor = TrainableEntityExtractor(self.extraction_identifier)
-        return trainable_entity_extractor.predict(prediction_samples)
+        predictions_memo = PredictionsMemo(self.extraction_identifier)
+        with self.trainable_entity_extractors_cache.loading(self.extraction_identifier):
+            suggestions = self.predict(trainable_entity_extractor, prediction_data_list, predictions_memo)
+        self.log_predictions_memo(predictions_memo)
+        return suggestions
+
+    def save_suggestions_in_chunks(self, chunk_size: int = PREDICTION_CHUNK_SIZE) -> (bool, str):
+        trainable_entity_extractor = TrainableEntityExtractor(self.extraction_identifier)
+        prediction_data_chunks = self.persistence_repository.load_prediction_data_chunks(
+            self.extraction_identifier, chunk_size
+        )
+        predictions_memo = PredictionsMemo(self.extraction_identifier)
+        staging_key = uuid.uuid4().hex
+        suggestions_count = 0
+        try:
+            for prediction_data_list in measure_iterator(self.SUGGESTIONS_TASK_NAME, "load", prediction_data_chunks):
+                with self.trainable_entity_extractors_cache.loading(self.extraction_identifier):
+                    suggestions = self.predict(trainable_entity_extractor, prediction_data_list, predictions_memo)
+                with measure_stage(self.SUGGESTIONS_TASK_NAME, "save"):
+                    self.persistence_repository.save_suggestions(self.extraction_identifier, suggestions, staging_key)
+                suggestions_count += len(suggestions)
+                send_logs(self.extraction_identifier, f"{suggestions_count} suggestions saved")
+        except Exception:
+            self.persistence_repository.delete_staged_suggestions(self.extraction_identifier, staging_key)
+            raise
+
+        self.persistence_repository.publish_staged_suggestions(self.extraction_identifier, staging_key)
+        SUGGESTIONS_SAVED.inc(suggestions_count)
+        self.log_predictions_memo(predictions_memo)
+
+        if not suggestions_count:
+            return False, "No data to calculate suggestions"
+
+        return True, ""
 
     def save_paragraphs_from_languages(self) -> (bool, str):
-        paragraph_extraction_data = self.persistence_repository.load_paragraph_extraction_data(self.extraction_identifier)
+        with measure_stage(PARAGRAPH_EXTRACTION_NAME, "load"):
+            paragraph_extraction_data = self.persistence_repository.load_paragraph_extraction_data(
+                self.extraction_identifier
+            )
         if not paragraph_extraction_data:
             return False, "No data to extract paragraphs"
 
+        DOCUMENTS_PROCESSED.labels(PARAGRAPH_EXTRACTION_NAME).inc(len(paragraph_extraction_data.xmls))
         paragraphs_from_languages = self.get_paragraphs_from_languages(paragraph_extraction_data)
 
-        aligner_use_case = MultilingualParagraphAlignerUseCase(self.extraction_identifier)
-        aligner_use_case.align_languages(paragraphs_from_languages)
+        with measure_stage(PARAGRAPH_EXTRACTION_NAME, "align"):
+            aligner_use_case = MultilingualParagraphAlignerUseCase(self.extraction_identifier)
+            aligner_use_case.align_languages(paragraphs_from_languages)
 
-        for paragraphs_from_language in paragraphs_from_languages:
-            self.persistence_repository.save_paragraphs_from_language(self.extraction_identifier, paragraphs_from_language)
+        with measure_stage(PARAGRAPH_EXTRACTION_NAME, "save"):
+            self.persistence_repository.save_paragraphs_from_languages(self.extraction_identifier, paragraphs_from_languages)
 
         return True, ""
 
     def get_paragraphs_from_languages(self, paragraph_extraction_data):
-        paragraphs_from_languages: list[ParagraphsFromLanguage] = list()
-        for xml_segments in paragraph_extraction_data.xmls:
-            segmentation_data = SegmentationData(
+        segmentation_data_list = [
+            SegmentationData(
                 page_width=0, page_height=0, xml_segments_boxes=xml_segments.xml_segments_boxes, label_segments_boxes=[]
             )
-            xml_file = XmlFile(
-                extraction_identifier=self.extraction_identifier, to_train=True, xml_file_name=xml_segments.xml_file_name
-            )
-            pdf_data = PdfData.from_xml_file(xml_file, segmentation_data)
+            for xml_segments in paragraph_extraction_data.xmls
+        ]
+        xml_files = [
+            XmlFile(extraction_identifier=self.extraction_identifier, to_train=True, xml_file_name=x.xml_file_name)
+            for x in paragraph_extraction_data.xmls
+        ]
+        page_numbers_list = [None] * len(xml_files)
+
+        missing_xml_files_names = [
+            x.xml_file_name for x in xml_files if not exists(x.xml_file_path) or isdir(x.xml_file_path)
+        ]
+        if missing_xml_files_names:
+            raise FileNotFoundError(f"XMLs to extract paragraphs not found: {', '.join(missing_xml_files_names)}")
+
+        pdf_data_list = self.parse_pdf_data(xml_files, segmentation_data_list, page_numbers_list, PARAGRAPH_EXTRACTION_NAME)
+
+        paragraphs_from_languages: list[ParagraphsFromLanguage] = list()
+        for xml_segments, pdf_data in zip(paragraph_extraction_data.xmls, pdf_data_list):
             paragraphs_from_language = ParagraphsFromLanguage(
                 language=xml_segments.language,
                 paragraphs=[ParagraphFeatures.from_pdf_data(pdf_data, x) for x in pdf_data.pdf_data_segments],
                 is_main_language=xml_segments.is_main_language,
             )
             paragraphs_from_languages.append(paragraphs_from_language)
-            xml_file.delete()
 
         return paragraphs_from_languages
 
     @staticmethod
-    def remove_old_models(extractor_identifier: ExtractionIdentifier):
-        if exists(extractor_identifier.get_path()):
-            os.utime(extractor_identifier.get_path())
+    def is_profiling_enabled(task: TrainableEntityExtractionTask | ParagraphExtractorTask) -> bool:
+        if PROFILE_TASKS:
+            return True
 
-        for run_name in os.listdir(DATA_PATH):
-            if run_name == "cache":
-                continue
+        if isinstance(task, TrainableEntityExtractionTask):
+            return task.params.metadata.get("profile", "").lower() in ["true", "1"]
 
-            for extraction_name in os.listdir(join(DATA_PATH, run_name)):
-                extractor_identifier_to_check = ExtractionIdentifier(
-                    run_name=run_name, extraction_name=extraction_name, output_path=DATA_PATH
-                )
-                if extractor_identifier_to_check.is_old():
-                    config_logger.info(f"Removing old model folder {extractor_identifier_to_check.get_path()}")
-                    shutil.rmtree(extractor_identifier_to_check.get_path(), ignore_errors=True)
+        return False
+
+    @staticmethod
+    def get_extraction_identifier(task: TrainableEntityExtractionTask | ParagraphExtractorTask) -> ExtractionIdentifier:
+        if isinstance(task, ParagraphExtractorTask):
+            return ExtractionIdentifier(run_name=PARAGRAPH_EXTRACTION_NAME, extraction_name=task.key, output_path=DATA_PATH)
+
+        return ExtractionIdentifier(
+            run_name=task.tenant, extraction_name=task.params.id, metadata=task.params.metadata, output_path=DATA_PATH
+        )
+
+    @staticmethod
+    def get_profile_path(task: TrainableEntityExtractionTask | ParagraphExtractorTask) -> str:
+        profile_name = f"{task.task}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.folded"
+        return join(Extractor.get_extraction_identifier(task).get_path(), "profiles", profile_name)
 
     @staticmethod
     def calculate_task(
         task: TrainableEntityExtractionTask | ParagraphExtractorTask, persistence_repository: PersistenceRepository
     ) -> (bool, str):
-        if task.task == Extractor.CREATE_MODEL_TASK_NAME:
-            extractor_identifier = ExtractionIdentifier(
-                run_name=task.tenant, extraction_name=task.params.id, metadata=task.params.metadata, output_path=DATA_PATH
-            )
+        if not Extractor.is_profiling_enabled(task):
+            return Extractor.execute_task(task, persistence_repository)
+
+        with SamplingProfiler(Extractor.get_profile_path(task)):
+            return Extractor.execute_task(task, persistence_repository)
+
+    @staticmethod
+    def execute_task(
+        task: TrainableEntityExtractionTask | ParagraphExtractorTask, persistence_repository: PersistenceRepository
+    ) -> (bool, str):
+        if task.task not in [Extractor.CREATE_MODEL_TASK_NAME, Extractor.SUGGESTIONS_TASK_NAME, PARAGRAPH_EXTRACTION_NAME]:
+            return False, "Error"
 
-            Extractor.remove_old_models(extractor_identifier)
+        extractor_identifier = Extractor.get_extraction_identifier(task)
+        task_started_at = time()
+        persistence_repository.update_model_registry_last_used(extractor_identifier, task_started_at, task_started_at)
+        try:
+            return Extractor.execute_extraction_task(task, extractor_identifier, persistence_repository)
+        finally:
+            ModelsJanitor.register_model(persistence_repository, extractor_identifier)
 
+    @staticmethod
+    def execute_extraction_task(
+        task: TrainableEntityExtractionTask | ParagraphExtractorTask,
+        extractor_identifier: ExtractionIdentifier,
+        persistence_repository: PersistenceRepository,
+    ) -> (bool, str):
+        if task.task == Extractor.CREATE_MODEL_TASK_NAME:
             if task.params.options:
                 options = task.params.options
             else:
                 options = extractor_identifier.get_options()
 
             multi_value = task.params.multi_value
-            extractor = Extractor(extractor_identifier, persistence_repository, options, multi_value)
+            incremental = task.params.incremental
+            extractor = Extractor(extractor_identifier, persistence_repository, options, multi_value, incremental)
             return extractor.create_models()
 
         if task.task == Extractor.SUGGESTIONS_TASK_NAME:
-            extractor_identifier = ExtractionIdentifier(
-                run_name=task.tenant, extraction_name=task.params.id, metadata=task.params.metadata, output_path=DATA_PATH
-            )
             extractor = Extractor(extractor_identifier, persistence_repository)
+            if PREDICTION_CHUNK_SIZE > 0:
+                return extractor.save_suggestions_in_chunks()
+
             suggestions = extractor.get_suggestions()
             return extractor.save_suggestions(suggestions)
 
-        if task.task == PARAGRAPH_EXTRACTION_NAME:
-            extractor_identifier = ExtractionIdentifier(
-                run_name=PARAGRAPH_EXTRACTION_NAME, extraction_name=task.key, output_path=DATA_PATH
-            )
-            extractor = Extractor(extractor_identifier, persistence_repository)
-            return extractor.save_paragraphs_from_languages()
-
-        return False, "Error"
+        extractor = Extractor(extractor_identifier, persistence_repository)
+        return extractor.save_paragraphs_from_languages()
@@ -0,0 +1,55 @@
+import resource
+import tracemalloc
+
+from config import TRACE_PYTHON_ALLOCATIONS, TASKS_WORKERS
+from domain.MemoryUsage import MemoryUsage
+
+
+class MemoryUsageTracker:
+    MB = 1024 * 1024
+
+    def __init__(self, trace_python_allocations: bool = TRACE_PYTHON_ALLOCATIONS, process_wide: bool = TASKS_WORKERS > 1):
+        self.trace_python_allocations = trace_python_allocations
+        self.process_wide = process_wide
+        self.memory_usage = None
+
+    @staticmethod
+    def reset_peak_rss():
+        try:
+            with open("/proc/self/clear_refs", "w") as file:
+                file.write("5")
+        except OSError:
+            pass
+
+    @staticmethod
+    def get_peak_rss() -> int:
+        try:
+            with open("/proc/self/status") as file:
+                for line in file:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def __enter__(self):
+        if not self.process_wide:
+            self.reset_peak_rss()
+        if self.trace_python_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            if not self.process_wide:
+                tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        python_peak_mb = None
+        if self.trace_python_allocations and tracemalloc.is_tracing():
+            python_peak_mb = round(tracemalloc.get_traced_memory()[1] / self.MB, 2)
+
+        self.memory_usage = MemoryUsage(
+            peak_rss_mb=round(self.get_peak_rss() / self.MB, 2),
+            python_peak_mb=python_peak_mb,
+            process_wide=self.process_wide,
+        )
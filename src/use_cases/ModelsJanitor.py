@@ -0,0 +1,128 @@
+import os
+import shutil
+from os.path import join, isdir
+from threading import Thread
+from time import time, sleep
+
+from trainable_entity_extractor.config import config_logger
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+
+from config import (
+    DATA_PATH,
+    MODELS_MAX_AGE_DAYS,
+    MODELS_DISK_QUOTA_GB,
+    MODELS_JANITOR_INTERVAL_SECONDS,
+    TASKS_VISIBILITY_TIMEOUT_SECONDS,
+)
+from domain.ModelRegistryEntry import ModelRegistryEntry
+from ports.PersistenceRepository import PersistenceRepository
+
+
+class ModelsJanitor:
+    FOLDERS_TO_SKIP = ["cache"]
+
+    def __init__(
+        self,
+        persistence_repository: PersistenceRepository,
+        max_age_days: int = MODELS_MAX_AGE_DAYS,
+        disk_quota_gb: float = MODELS_DISK_QUOTA_GB,
+        interval_seconds: int = MODELS_JANITOR_INTERVAL_SECONDS,
+        task_timeout_seconds: int = TASKS_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        self.persistence_repository = persistence_repository
+        self.max_age = max_age_days * 24 * 3600
+        self.disk_quota = int(disk_quota_gb * 1024 * 1024 * 1024)
+        self.interval_seconds = interval_seconds
+        self.task_timeout_seconds = task_timeout_seconds
+
+    @staticmethod
+    def get_folder_size(path: str) -> int:
+        size = 0
+        for folder_path, _, files in os.walk(path):
+            for file_name in files:
+                try:
+                    size += os.path.getsize(join(folder_path, file_name))
+                except OSError:
+                    pass
+        return size
+
+    @staticmethod
+    def register_model(persistence_repository: PersistenceRepository, extraction_identifier: ExtractionIdentifier):
+        model_registry_entry = ModelRegistryEntry(
+            run_name=extraction_identifier.run_name,
+            extraction_name=extraction_identifier.extraction_name,
+            last_used=time(),
+            size=ModelsJanitor.get_folder_size(extraction_identifier.get_path()),
+        )
+        persistence_repository.save_model_registry_entry(model_registry_entry)
+
+    def register_unknown_models(self):
+        if not isdir(DATA_PATH):
+            return
+
+        registered = {(x.run_name, x.extraction_name) for x in self.persistence_repository.load_model_registry()}
+        for run_name in os.listdir(DATA_PATH):
+            if run_name in self.FOLDERS_TO_SKIP or not isdir(join(DATA_PATH, run_name)):
+                continue
+
+            for extraction_name in os.listdir(join(DATA_PATH, run_name)):
+                path = join(DATA_PATH, run_name, extraction_name)
+                if (run_name, extraction_name) in registered or not isdir(path):
+                    continue
+
+                model_registry_entry = ModelRegistryEntry(
+                    run_name=run_name,
+                    extraction_name=extraction_name,
+                    last_used=os.path.getmtime(path),
+                    size=self.get_folder_size(path),
+                )
+                self.persistence_repository.save_model_registry_entry(model_registry_entry)
+
+    def is_task_in_progress(self, entry: ModelRegistryEntry, now: float) -> bool:
+        return entry.task_started_at is not None and now - entry.task_started_at < self.task_timeout_seconds
+
+    def get_entries_to_remove(self, entries: list[ModelRegistryEntry], now: float) -> list[ModelRegistryEntry]:
+        entries_in_progress = [x for x in entries if self.is_task_in_progress(x, now)]
+        removable_entries = [x for x in entries if not self.is_task_in_progress(x, now)]
+        entries_to_remove = [x for x in removable_entries if now - x.last_used > self.max_age]
+        remaining_entries = sorted(
+            [x for x in removable_entries if now - x.last_used <= self.max_age], key=lambda x: x.last_used
+        )
+
+        if not self.disk_quota:
+            return entries_to_remove
+
+        total_size = sum(x.size for x in remaining_entries + entries_in_progress)
+        for entry in remaining_entries:
+            if total_size <= self.disk_quota:
+                break
+            entries_to_remove.append(entry)
+            total_size -= entry.size
+
+        return entries_to_remove
+
+    def clean(self):
+        entries = self.persistence_repository.load_model_registry()
+        for entry in self.get_entries_to_remove(entries, time()):
+            extraction_identifier = ExtractionIdentifier(
+                run_name=entry.run_name, extraction_name=entry.extraction_name, output_path=DATA_PATH
+            )
+            config_logger.info(f"Removing old model folder {extraction_identifier.get_path()}")
+            shutil.rmtree(extraction_identifier.get_path(), ignore_errors=True)
+            self.persistence_repository.delete_model_registry_entry(extraction_identifier)
+
+    def run(self):
+        try:
+            self.register_unknown_models()
+        except Exception:
+            config_logger.error("Error registering models", exc_info=1)
+
+        while True:
+            try:
+                self.clean()
+            except Exception:
+                config_logger.error("Error removing old models", exc_info=1)
+            sleep(self.interval_seconds)
+
+    def start(self):
+        Thread(target=self.run, daemon=True).start()
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import pickle
+from os.path import join
+from pathlib import Path
+from typing import Optional
+
+from trainable_entity_extractor.domain.PdfData import PdfData
+from trainable_entity_extractor.domain.SegmentationData import SegmentationData
+
+from config import PDF_DATA_CACHE_PATH, PDF_DATA_CACHE_MAX_SIZE_MB
+from use_cases.metrics import CACHE_LOOKUPS
+
+
+class PdfDataCache:
+    READ_BLOCK_SIZE = 1024 * 1024
+    METRICS_NAME = "pdf_data"
+    EVICT_AFTER_WRITTEN_FRACTION = 0.1
+    written_bytes: dict[str, int] = dict()
+
+    def __init__(self, cache_path: str = PDF_DATA_CACHE_PATH, max_size_mb: int = PDF_DATA_CACHE_MAX_SIZE_MB):
+        self.cache_path = cache_path
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    def is_enabled(self) -> bool:
+        return self.max_size > 0
+
+    @staticmethod
+    def get_key(xml_file_path: str, segmentation_data: SegmentationData, page_numbers: Optional[list[int]]) -> str:
+        content_hash = hashlib.sha256()
+        with open(xml_file_path, "rb") as xml_file:
+            for block in iter(lambda: xml_file.read(PdfDataCache.READ_BLOCK_SIZE), b""):
+                content_hash.update(block)
+
+        content_hash.update(segmentation_data.model_dump_json().encode())
+        content_hash.update(json.dumps(page_numbers).encode())
+        return content_hash.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return join(self.cache_path, f"{key}.pickle")
+
+    def get(self, key: str) -> Optional[PdfData]:
+        try:
+            with open(self.get_path(key), "rb") as file:
+                pdf_data = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            CACHE_LOOKUPS.labels(self.METRICS_NAME, "miss").inc()
+            return None
+
+        Path(self.get_path(key)).touch()
+        self.hits += 1
+        CACHE_LOOKUPS.labels(self.METRICS_NAME, "hit").inc()
+        return pdf_data
+
+    def set(self, key: str, pdf_data: PdfData):
+        os.makedirs(self.cache_path, exist_ok=True)
+        temporary_path = f"{self.get_path(key)}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump(pdf_data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            written_bytes = file.tell()
+        os.replace(temporary_path, self.get_path(key))
+        PdfDataCache.written_bytes[self.cache_path] = PdfDataCache.written_bytes.get(self.cache_path, 0) + written_bytes
+
+    def evict_if_needed(self):
+        if PdfDataCache.written_bytes.get(self.cache_path, 0) < self.max_size * self.EVICT_AFTER_WRITTEN_FRACTION:
+            return
+
+        PdfDataCache.written_bytes[self.cache_path] = 0
+        self.evict()
+
+    def evict(self):
+        if not os.path.exists(self.cache_path):
+            return
+
+        entries = [(entry.path, entry.stat()) for entry in os.scandir(self.cache_path) if entry.name.endswith(".pickle")]
+        cache_size = sum(stat.st_size for _, stat in entries)
+        for path, stat in sorted(entries, key=lambda x: x[1].st_mtime):
+            if cache_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            cache_size -= stat.st_size
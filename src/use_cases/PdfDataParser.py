@@ -0,0 +1,145 @@
+import atexit
+import copy
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from os.path import exists
+from threading import Lock
+from typing import Optional
+
+from trainable_entity_extractor.domain.PdfData import PdfData
+from trainable_entity_extractor.domain.SegmentationData import SegmentationData
+from trainable_entity_extractor.use_cases.XmlFile import XmlFile
+
+from config import XML_PARSING_WORKERS
+from use_cases.PdfDataCache import PdfDataCache
+
+
+def parse_xml_file(xml_file: XmlFile, segmentation_data: SegmentationData) -> PdfData:
+    if exists(xml_file.xml_file_path) and not os.path.isdir(xml_file.xml_file_path):
+        return PdfData.from_xml_file(xml_file, segmentation_data)
+
+    return PdfData.from_texts([""])
+
+
+class PdfDataParser:
+    executors: dict[int, ProcessPoolExecutor] = dict()
+    executors_lock = Lock()
+
+    def __init__(self, workers: int = XML_PARSING_WORKERS, pdf_data_cache: PdfDataCache = None):
+        self.workers = max(1, workers)
+        self.pdf_data_cache = pdf_data_cache if pdf_data_cache else PdfDataCache()
+
+    @staticmethod
+    def get_multiprocessing_context():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+
+    @staticmethod
+    def get_executor(workers: int) -> ProcessPoolExecutor:
+        with PdfDataParser.executors_lock:
+            if workers not in PdfDataParser.executors:
+                context = PdfDataParser.get_multiprocessing_context()
+                PdfDataParser.executors[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            return PdfDataParser.executors[workers]
+
+    @staticmethod
+    def remove_executor(workers: int):
+        with PdfDataParser.executors_lock:
+            executor = PdfDataParser.executors.pop(workers, None)
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def shutdown_executors():
+        with PdfDataParser.executors_lock:
+            executors = list(PdfDataParser.executors.values())
+            PdfDataParser.executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def get_unlabeled_segmentation_data(segmentation_data: SegmentationData) -> SegmentationData:
+        return segmentation_data.model_copy(update={"label_segments_boxes": []})
+
+    @staticmethod
+    def get_labeled_pdf_data(
+        pdf_data: PdfData, segmentation_data: SegmentationData, page_numbers: Optional[list[int]]
+    ) -> PdfData:
+        labeled_pdf_data = copy.copy(pdf_data)
+        if page_numbers and pdf_data.pdf_features:
+            labeled_pdf_data.pdf_features = copy.copy(pdf_data.pdf_features)
+            labeled_pdf_data.pdf_features.pages = [x for x in pdf_data.pdf_features.pages if x.page_number in page_numbers]
+
+        segments = [x for x in pdf_data.pdf_data_segments if not page_numbers or x.page_number in page_numbers]
+        labeled_pdf_data.pdf_data_segments = [copy.copy(x) for x in segments]
+        for segment in labeled_pdf_data.pdf_data_segments:
+            segment.ml_label = 0
+        labeled_pdf_data.set_ml_label_from_segmentation_data(segmentation_data)
+        return labeled_pdf_data
+
+    def get_cache_key(self, xml_file: XmlFile, segmentation_data: SegmentationData) -> Optional[str]:
+        if not self.pdf_data_cache.is_enabled():
+            return None
+
+        if not exists(xml_file.xml_file_path) or os.path.isdir(xml_file.xml_file_path):
+            return None
+
+        return self.pdf_data_cache.get_key(xml_file.xml_file_path, segmentation_data, None)
+
+    def parse(
+        self,
+        xml_files: list[XmlFile],
+        segmentation_data_list: list[SegmentationData],
+        page_numbers_list: list[Optional[list[int]]],
+    ) -> list[PdfData]:
+        pdf_data_list = self.parse_unlabeled(xml_files, segmentation_data_list)
+        return [
+            self.get_labeled_pdf_data(pdf_data, segmentation_data, page_numbers)
+            for pdf_data, segmentation_data, page_numbers in zip(pdf_data_list, segmentation_data_list, page_numbers_list)
+        ]
+
+    def parse_unlabeled(self, xml_files: list[XmlFile], segmentation_data_list: list[SegmentationData]) -> list[PdfData]:
+        unlabeled_segmentation_data_list = [self.get_unlabeled_segmentation_data(x) for x in segmentation_data_list]
+        keys: list[Optional[str]] = list()
+        pdf_data_list: list[Optional[PdfData]] = list()
+        for xml_file, segmentation_data in zip(xml_files, unlabeled_segmentation_data_list):
+            key = self.get_cache_key(xml_file, segmentation_data)
+            keys.append(key)
+            pdf_data_list.append(self.pdf_data_cache.get(key) if key else None)
+
+        indexes_to_parse = [index for index, pdf_data in enumerate(pdf_data_list) if pdf_data is None]
+        parsed_pdf_data_list = self.parse_xml_files(
+            [xml_files[index] for index in indexes_to_parse],
+            [unlabeled_segmentation_data_list[index] for index in indexes_to_parse],
+        )
+
+        for index, pdf_data in zip(indexes_to_parse, parsed_pdf_data_list):
+            pdf_data_list[index] = pdf_data
+            if keys[index]:
+                self.pdf_data_cache.set(keys[index], pdf_data)
+
+        for xml_file in xml_files:
+            xml_file.delete()
+
+        if self.pdf_data_cache.is_enabled():
+            self.pdf_data_cache.evict_if_needed()
+
+        return pdf_data_list
+
+    def parse_xml_files(self, xml_files: list[XmlFile], segmentation_data_list: list[SegmentationData]) -> list[PdfData]:
+        if self.workers == 1 or len(xml_files) < 2:
+            return list(map(parse_xml_file, xml_files, segmentation_data_list))
+
+        chunk_size = max(1, len(xml_files) // (self.workers * 4))
+        executor = self.get_executor(self.workers)
+        try:
+            return list(executor.map(parse_xml_file, xml_files, segmentation_data_list, chunksize=chunk_size))
+        except BrokenProcessPool:
+            self.remove_executor(self.workers)
+            raise
+
+
+atexit.register(PdfDataParser.shutdown_executors)
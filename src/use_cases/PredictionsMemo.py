@@ -0,0 +1,56 @@
+import hashlib
+import os
+import shutil
+import uuid
+from os.path import join
+from typing import Optional
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.PredictionData import PredictionData
+from trainable_entity_extractor.domain.SegmentationData import SegmentationData
+
+from config import PREDICTIONS_MEMO_MAX_SIZE_MB
+from use_cases.PdfDataCache import PdfDataCache
+
+
+class PredictionsMemo(PdfDataCache):
+    FOLDER_NAME = "predictions_memo"
+    METRICS_NAME = "predictions_memo"
+    MODEL_VERSION_FILE_NAME = "model_version"
+
+    def __init__(self, extraction_identifier: ExtractionIdentifier, max_size_mb: int = PREDICTIONS_MEMO_MAX_SIZE_MB):
+        super().__init__(join(extraction_identifier.get_path(), self.FOLDER_NAME), max_size_mb)
+        self.model_version = None
+
+    def get_model_version(self) -> str:
+        if self.model_version:
+            return self.model_version
+
+        model_version_path = join(self.cache_path, self.MODEL_VERSION_FILE_NAME)
+        try:
+            with open(model_version_path) as file:
+                self.model_version = file.read().strip()
+        except OSError:
+            self.model_version = uuid.uuid4().hex
+            os.makedirs(self.cache_path, exist_ok=True)
+            with open(model_version_path, "w") as file:
+                file.write(self.model_version)
+
+        return self.model_version
+
+    def get_prediction_key(
+        self,
+        xml_file_path: str,
+        segmentation_data: SegmentationData,
+        page_numbers: Optional[list[int]],
+        prediction_data: PredictionData,
+    ) -> str:
+        prediction_hash = hashlib.sha256(self.get_key(xml_file_path, segmentation_data, page_numbers).encode())
+        prediction_hash.update(self.get_model_version().encode())
+        for value in [prediction_data.xml_file_name, prediction_data.entity_name, prediction_data.source_text]:
+            prediction_hash.update(f"\0{value}".encode())
+        return prediction_hash.hexdigest()
+
+    def delete(self):
+        shutil.rmtree(self.cache_path, ignore_errors=True)
+        self.model_version = None
@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+from collections import Counter
+from os.path import basename, dirname
+from time import perf_counter
+from types import FrameType
+
+from trainable_entity_extractor.config import config_logger
+
+from config import PROFILING_INTERVAL_SECONDS
+
+
+class SamplingProfiler:
+    def __init__(self, profile_path: str, interval_seconds: float = PROFILING_INTERVAL_SECONDS):
+        self.profile_path = profile_path
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[str] = Counter()
+        self.stop_event = threading.Event()
+        self.thread_id = None
+        self.sampling_thread = None
+        self.start_time = 0
+
+    @staticmethod
+    def get_folded_stack(frame: FrameType) -> str:
+        functions: list[str] = list()
+        while frame:
+            code = frame.f_code
+            functions.append(f"{code.co_name} ({basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(functions))
+
+    def sample(self):
+        while not self.stop_event.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame:
+                self.stacks[self.get_folded_stack(frame)] += 1
+
+    def write_profile(self):
+        os.makedirs(dirname(self.profile_path), exist_ok=True)
+        with open(self.profile_path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.start_time = perf_counter()
+        self.sampling_thread = threading.Thread(target=self.sample, daemon=True)
+        self.sampling_thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop_event.set()
+        self.sampling_thread.join()
+        try:
+            self.write_profile()
+            config_logger.info(
+                f"Profile of {round(perf_counter() - self.start_time, 2)} seconds "
+                f"with {sum(self.stacks.values())} samples saved in {self.profile_path}"
+            )
+        except OSError:
+            config_logger.error(f"Error saving profile {self.profile_path}", exc_info=1)
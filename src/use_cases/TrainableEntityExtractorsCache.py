@@ -0,0 +1,192 @@
+import importlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from os.path import abspath, exists, join
+from typing import Any, Callable, Optional
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+
+from config import MODELS_CACHE_MEMORY_BUDGET_MB, MODELS_CACHE_PATCH_LOADERS
+
+
+class TrainableEntityExtractorsCache:
+    LOADERS = [("transformers", "PreTrainedModel", "from_pretrained"), ("setfit", "SetFitModel", "from_pretrained")]
+
+    def __init__(
+        self, memory_budget_mb: int = MODELS_CACHE_MEMORY_BUDGET_MB, patch_loaders: bool = MODELS_CACHE_PATCH_LOADERS
+    ):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.patch_loaders = patch_loaders
+        self.models: OrderedDict[tuple[str, str, str], tuple[Any, int, float]] = OrderedDict()
+        self.models_in_use: dict[tuple[str, str, str], int] = dict()
+        self.original_loaders: dict[tuple[type, str], Optional[Any]] = dict()
+        self.loading_scopes = 0
+        self.lock = threading.Lock()
+        self.install_lock = threading.Lock()
+        self.local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_version(path: str) -> float:
+        if not exists(path):
+            return 0
+
+        version = os.path.getmtime(path)
+        for folder_path, _, files in os.walk(path):
+            for file_name in files:
+                try:
+                    version = max(version, os.path.getmtime(join(folder_path, file_name)))
+                except OSError:
+                    pass
+        return version
+
+    @staticmethod
+    def get_disk_size(path: str) -> int:
+        if not os.path.isdir(path):
+            return os.path.getsize(path) if exists(path) else 0
+
+        size = 0
+        for folder_path, _, files in os.walk(path):
+            for file_name in files:
+                try:
+                    size += os.path.getsize(join(folder_path, file_name))
+                except OSError:
+                    pass
+        return size
+
+    @staticmethod
+    def get_memory_size(model: Any) -> int:
+        modules = [model, *vars(model).values()] if hasattr(model, "__dict__") else [model]
+        size = 0
+        for module in modules:
+            if not callable(getattr(module, "parameters", None)) or not callable(getattr(module, "buffers", None)):
+                continue
+            tensors = [*module.parameters(), *module.buffers()]
+            size += sum(x.numel() * x.element_size() for x in tensors)
+        return size
+
+    def get_size(self) -> int:
+        return sum(size for _, size, _ in self.models.values())
+
+    def get(self, key: tuple[str, str, str], version: float) -> Optional[Any]:
+        with self.lock:
+            if key not in self.models:
+                return None
+
+            model, _, model_version = self.models[key]
+            if model_version != version:
+                self.models.pop(key)
+                return None
+
+            self.models.move_to_end(key)
+            return model
+
+    def set(self, key: tuple[str, str, str], model: Any, size: int, version: float):
+        if size > self.memory_budget:
+            return
+
+        with self.lock:
+            self.models[key] = (model, size, version)
+            self.models.move_to_end(key)
+            while self.get_size() > self.memory_budget:
+                self.models.popitem(last=False)
+
+    def use(self, key: tuple[str, str, str]) -> bool:
+        with self.lock:
+            if self.models_in_use.get(key, threading.get_ident()) != threading.get_ident():
+                return False
+            self.models_in_use[key] = threading.get_ident()
+
+        self.local.keys.append(key)
+        return True
+
+    def load(self, loader_name: str, loader: Callable, path: Any, args: tuple, kwargs: dict) -> Any:
+        extraction_identifier: Optional[ExtractionIdentifier] = getattr(self.local, "extraction_identifier", None)
+        model_path = abspath(str(path))
+        if not extraction_identifier or not model_path.startswith(abspath(extraction_identifier.get_path()) + os.sep):
+            return loader(path, *args, **kwargs)
+
+        key = (loader_name, model_path, repr(sorted(kwargs.items())))
+        if not self.use(key):
+            self.misses += 1
+            return loader(path, *args, **kwargs)
+
+        version = self.get_version(model_path)
+        model = self.get(key, version)
+        if model is not None:
+            self.hits += 1
+            return model
+
+        self.misses += 1
+        model = loader(path, *args, **kwargs)
+        self.set(key, model, self.get_memory_size(model) or self.get_disk_size(model_path), version)
+        return model
+
+    def install_loader(self, module_name: str, class_name: str, method_name: str):
+        try:
+            loader_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError):
+            return
+
+        loader_method = inspect.getattr_static(loader_class, method_name, None)
+        if not isinstance(loader_method, classmethod):
+            return
+
+        loader_function = loader_method.__func__
+
+        def cached_loader(cls, path=None, *args, **kwargs):
+            if path is None:
+                path = kwargs.pop("pretrained_model_name_or_path", None)
+            if path is None:
+                return loader_function(cls, *args, **kwargs)
+
+            loader_name = f"{cls.__module__}.{cls.__qualname__}.{method_name}"
+            return self.load(loader_name, partial(loader_function, cls), path, args, kwargs)
+
+        self.original_loaders[(loader_class, method_name)] = vars(loader_class).get(method_name)
+        setattr(loader_class, method_name, classmethod(cached_loader))
+
+    def restore_loaders(self):
+        for (loader_class, method_name), loader_method in self.original_loaders.items():
+            if loader_method is None:
+                delattr(loader_class, method_name)
+            else:
+                setattr(loader_class, method_name, loader_method)
+        self.original_loaders.clear()
+
+    @contextmanager
+    def loading(self, extraction_identifier: ExtractionIdentifier):
+        if not self.patch_loaders:
+            yield self
+            return
+
+        with self.install_lock:
+            if not self.loading_scopes:
+                for module_name, class_name, method_name in self.LOADERS:
+                    self.install_loader(module_name, class_name, method_name)
+            self.loading_scopes += 1
+
+        self.local.extraction_identifier = extraction_identifier
+        self.local.keys = list()
+        try:
+            yield self
+        finally:
+            with self.lock:
+                for key in self.local.keys:
+                    self.models_in_use.pop(key, None)
+            self.local.extraction_identifier = None
+            with self.install_lock:
+                self.loading_scopes -= 1
+                if not self.loading_scopes:
+                    self.restore_loaders()
+
+    def invalidate(self, extraction_identifier: ExtractionIdentifier):
+        extraction_path = abspath(extraction_identifier.get_path()) + os.sep
+        with self.lock:
+            for key in [x for x in self.models if x[1].startswith(extraction_path)]:
+                self.models.pop(key)
@@ -0,0 +1,49 @@
+import hashlib
+import os
+import pickle
+import shutil
+from os.path import join, exists
+
+from trainable_entity_extractor.domain.ExtractionIdentifier import ExtractionIdentifier
+from trainable_entity_extractor.domain.TrainingSample import TrainingSample
+
+
+class TrainingSamplesSnapshot:
+    FOLDER_NAME = "training_samples"
+
+    def __init__(self, extraction_identifier: ExtractionIdentifier):
+        self.folder_path = join(extraction_identifier.get_path(), self.FOLDER_NAME)
+
+    def get_path(self, xml_file_name: str) -> str:
+        return join(self.folder_path, f"{hashlib.sha256(xml_file_name.encode()).hexdigest()}.pickle")
+
+    def load(self) -> list[TrainingSample]:
+        if not exists(self.folder_path):
+            return list()
+
+        training_samples: list[TrainingSample] = list()
+        for entry in sorted(os.scandir(self.folder_path), key=lambda x: x.name):
+            if not entry.name.endswith(".pickle"):
+                continue
+            try:
+                with open(entry.path, "rb") as file:
+                    training_samples.append(pickle.load(file))
+            except (OSError, EOFError, pickle.UnpicklingError):
+                continue
+
+        return training_samples
+
+    def save(self, training_samples: list[TrainingSample], overwrite: bool = True):
+        os.makedirs(self.folder_path, exist_ok=True)
+        for training_sample in training_samples:
+            path = self.get_path(training_sample.labeled_data.xml_file_name)
+            if not overwrite and exists(path):
+                continue
+
+            temporary_path = f"{path}.{os.getpid()}.tmp"
+            with open(temporary_path, "wb") as file:
+                pickle.dump(training_sample, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+
+    def delete(self):
+        shutil.rmtree(self.folder_path, ignore_errors=True)
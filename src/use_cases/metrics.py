@@ -0,0 +1,70 @@
+import os
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator, TypeVar
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+T = TypeVar("T")
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+STAGE_SECONDS = Histogram(
+    "pdf_metadata_extraction_stage_seconds",
+    "Time spent in each stage of the worker tasks",
+    ["task", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+DOCUMENTS_PROCESSED = Counter("pdf_metadata_extraction_documents_processed", "Documents processed", ["task"])
+PARSED_BYTES = Counter("pdf_metadata_extraction_parsed_bytes", "Bytes of XML files sent to the parser", ["task"])
+SUGGESTIONS_SAVED = Counter("pdf_metadata_extraction_suggestions_saved", "Suggestions saved")
+QUEUE_WAIT_SECONDS = Histogram(
+    "pdf_metadata_extraction_queue_wait_seconds",
+    "Time the tasks wait in the queue before running",
+    ["task_type"],
+    buckets=STAGE_BUCKETS,
+)
+STARVING_TASKS_PROMOTED = Counter(
+    "pdf_metadata_extraction_starving_tasks_promoted",
+    "Tasks run ahead of their priority because they waited more than the max wait",
+    ["task_type"],
+)
+CACHE_LOOKUPS = Counter(
+    "pdf_metadata_extraction_cache_lookups", "Lookups in the parsed PDF data caches", ["cache", "result"]
+)
+
+
+@contextmanager
+def measure_stage(task: str, stage: str):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(task, stage).observe(perf_counter() - start)
+
+
+def measure_iterator(task: str, stage: str, iterator: Iterator[T]) -> Iterator[T]:
+    iterator = iter(iterator)
+    while True:
+        start = perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        STAGE_SECONDS.labels(task, stage).observe(perf_counter() - start)
+        yield item
+
+
+def get_files_size(paths: list[str]) -> int:
+    size = 0
+    for path in paths:
+        try:
+            size += os.path.getsize(path)
+        except OSError:
+            pass
+    return size
+
+
+def start_metrics_server(port: int):
+    if port:
+        start_http_server(port)